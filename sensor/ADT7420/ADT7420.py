@@ -246,8 +246,12 @@
 # [7:3]     | 11001     | R         | Manufacture ID| Contains the manufacture identification number
 # ----------------------------------------------------------------------------------------------------------------------
 
-import pigpio
 import time
+from bus import PigpioBus, BUS_REG_FILE_SIZE
+from scheduler import Scheduler
+from samplelog import SampleLog
+from decode import decode_code, DEC_RES_16
+from regmap import RegMap
 
 SENS_MSG_BOOT = 'Temperature Sensor'
 SENS_MSG_REV = 'Rev'
@@ -270,27 +274,36 @@ class ADT7420:
     I2C_REG_STATUS = 0x02
     I2C_REG_CONFIG = 0x03
     I2C_REG_ID = 0x0B
+    I2C_BURST_TEMP = 3  # MSB, LSB and status in one transaction
+    I2C_BURST_NO_STATUS = 2  # MSB and LSB only; reading status clears its flags and releases INT (Table 10)
     I2C_MODE = 0b10000000  # Table 11
+    I2C_STATUS_RDY = 0b10000000  # Table 10, active low
+    I2C_OP_MASK = 0b01100000  # Table 11, operation mode
+    I2C_OP_CONTINUOUS = 0b00000000
+    I2C_OP_ONE_SHOT = 0b00100000
+    I2C_OP_1SPS = 0b01000000
+    I2C_OP_SHUTDOWN = 0b01100000
+    I2C_CONV_TIME = 0.240  # Table 11, one conversion
+    I2C_RDY_POLL = 0.005
+    I2C_RDY_TIMEOUT = 2 * I2C_CONV_TIME  # the Table 11 time is typical, a conversion may take longer
     DEV_MASK_REV_ID = 0b00000111
     DEV_MASK_MAN_ID = 0b00011111
 
     class I2CData:
-        I2C_REG_SIGN = 0b10000000000000000
-
-        def __init__(self, msb, lsb):
+        def __init__(self, msb, lsb, status=0):
             self.msb = msb
             self.lsb = lsb
+            self.status = status
+
+        def code(self):
+            return (self.msb << 8) | self.lsb
 
-        def convert(self):
-            adc_code = ((self.msb << 8) | self.lsb)
-            if adc_code & self.I2C_REG_SIGN:
-                temp = (adc_code - 65536) / 128.0
-            else:
-                temp = adc_code / 128.0
-            return temp
+        def convert(self, resolution=DEC_RES_16):
+            return decode_code(self.code(), resolution)
 
-    def __init__(self, bus, addr, delay, mon_file, console_msg):
+    def __init__(self, bus, addr, delay, mon_file, console_msg, backend=None, sync_ready=False, log_opts=None):
         self.temp = None
+        self.i2c_data = None
         self.time = None
         self.time_str = None
         self.log = None
@@ -298,19 +311,28 @@ class ADT7420:
         self.i2c_addr = addr
         self.i2c_delay = delay
         self.mon_file = mon_file
+        self.log_opts = log_opts or {}
         self.con = console_msg
         self.i2c_flags = 0
-
-        self.dev_pi = pigpio.pi()
-        self.dev_temp = self.dev_pi.i2c_open(self.i2c_bus, self.i2c_addr, self.i2c_flags)
-
-        self.dev_id = self.dev_pi.i2c_read_byte_data(self.dev_temp, self.I2C_REG_ID)
+        self.sync_ready = sync_ready
+        self.rdy_timeouts = 0
+        self.i2c_burst = self.I2C_BURST_TEMP
+        self.sched = Scheduler(self.i2c_delay)
+        self.listeners = []
+        self.profiler = None
+
+        self.dev_bus = backend if backend is not None else PigpioBus()
+        self.dev_temp = self.dev_bus.open(self.i2c_bus, self.i2c_addr, self.i2c_flags)
+
+        self.regs = RegMap(self.dev_bus, self.dev_temp)
+        self.dev_id = self.regs[self.I2C_REG_ID]
         self.dev_rev_id = self.DEV_MASK_REV_ID & self.dev_id
         self.dev_man_id = self.DEV_MASK_MAN_ID & (self.dev_id >> 3)
         self.open_log()
         self.log_connection()
         self.log_sensor_info()
-        self.dev_pi.i2c_write_byte_data(self.dev_temp, self.I2C_REG_CONFIG, self.I2C_MODE)
+        self.regs[self.I2C_REG_CONFIG] = self.I2C_MODE
+        self.regs.flush()
 
     def __del__(self):
         self.disconnect()
@@ -318,29 +340,81 @@ class ADT7420:
         self.close_log()
 
     def read_i2c(self):
-        msb = self.dev_pi.i2c_read_byte_data(self.dev_temp, self.I2C_REG_MSB_TEMP)
-        lsb = self.dev_pi.i2c_read_byte_data(self.dev_temp, self.I2C_REG_LSB_TEMP)
-        return self.I2CData(msb, lsb)
+        buf = self.dev_bus.read_block(self.dev_temp, self.I2C_REG_MSB_TEMP, self.i2c_burst)
+        return self.I2CData(buf[0], buf[1], buf[2] if self.i2c_burst > self.I2C_BURST_NO_STATUS else 0)
+
+    def read_registers(self):
+        return self.dev_bus.read_block(self.dev_temp, self.I2C_REG_MSB_TEMP, BUS_REG_FILE_SIZE)
+
+    def set_op_mode(self, mode):
+        cfg = self.regs[self.I2C_REG_CONFIG]
+        self.regs[self.I2C_REG_CONFIG] = (cfg & ~self.I2C_OP_MASK) | mode
+        self.regs.flush()
+
+    def data_ready(self):
+        status = self.dev_bus.read_byte(self.dev_temp, self.I2C_REG_STATUS)
+        return not (status & self.I2C_STATUS_RDY)
+
+    def wait_ready(self, timeout=I2C_RDY_TIMEOUT):
+        deadline = time.monotonic() + timeout
+        while not self.data_ready():
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(self.I2C_RDY_POLL)
+        return True
 
     def read_time(self):
-        self.time = time.time()
+        self.time = self.dev_bus.now(self.dev_temp)
         self.time_str = str(time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.time)))
 
     def read(self):
-        i2c_data = self.read_i2c()
+        p = self.profiler
+        if p:
+            t = p.clock()
+        self.i2c_data = self.read_i2c()
+        if p:
+            t = p.mark('read_i2c', t)
         self.read_time()
-        self.temp = c2f(i2c_data.convert())
+        if p:
+            t = p.mark('read_time', t)
+        self.temp = c2f(self.i2c_data.convert(self.regs.resolution))
+        if p:
+            t = p.mark('convert', t)
+        for listener in self.listeners:
+            listener(self)
+        if p and self.listeners:
+            p.mark('listeners', t)
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    # Listeners that write files (exporters, archives, stores) have a close()
+    def close_listeners(self):
+        for listener in self.listeners:
+            if hasattr(listener, 'close'):
+                listener.close()
 
     def read_once(self):
+        # Without a fresh conversion the registers still hold the last sample; skip rather than log it twice
+        if self.sync_ready and not self.wait_ready():
+            self.rdy_timeouts += 1
+            self.sched.wait()
+            return
         self.read()
-        self.log_data()
-        time.sleep(self.i2c_delay)
+        if self.profiler:
+            t = self.profiler.clock()
+            self.log_data()
+            self.profiler.mark('log_data', t)
+        else:
+            self.log_data()
+        self.sched.wait()
 
     def disconnect(self):
-        r = self.dev_pi.i2c_close(self.dev_temp)
+        r = self.dev_bus.close(self.dev_temp)
         return r
 
     def monitor(self):
+        self.sched.start()
         try:
             while True:
                 self.read_once()
@@ -348,6 +422,14 @@ class ADT7420:
         except KeyboardInterrupt:
             pass
 
+        finally:
+            self.close_listeners()
+
+        if self.con:
+            print(self.sched.report())
+            if self.profiler:
+                print(self.profiler.report())
+
     # Log information
     def log_connection(self):
         self.read_time()
@@ -372,13 +454,12 @@ class ADT7420:
         self.log.write('{0}\n'.format(msg))
 
     def log_data(self):
-        msg = '{0}, {1}'.format(self.time_str, str(self.temp))
         if self.con:
-            print(msg)
-        self.log.write('{0}\n'.format(msg))
+            print('{0}, {1}'.format(self.time_str, str(self.temp)))
+        self.log.add(self.time, self.i2c_addr, self.i2c_data.code(), self.i2c_data.status, self.temp)
 
     def open_log(self):
-        self.log = open(self.mon_file, 'w')
+        self.log = SampleLog(self.mon_file, **self.log_opts)
 
     def close_log(self):
         self.log.close()
@@ -0,0 +1,131 @@
+########################################################################################################################
+# THIS IS AN UNPUBLISHED WORK CONTAINING Rohit Priyadarshi's CONFIDENTIAL AND PROPRIETARY INFORMATION, CREATED IN 2018
+#
+# I have worked very hard to create a quality product and wish to realize the fair fruits of my labor. I therefore
+# insist that you honor my copyright. This material is provided 'as is', with absolutely no warranty expressed or
+# implied. However, I want to encourage the use of my product in all possible circumstances and will work very hard to
+# meet your needs if you will contact me at rohit@rishkan.com and ask for permission.
+########################################################################################################################
+
+########################################################################################################################
+# Adaptive sampling
+#
+# The next period is the time a linear extrapolation at the observed rate of change (EWMA of dT/dt) takes to drift
+# by error_bound, clamped to [min_period, max_period]. A sample that misses its prediction by more than error_bound
+# snaps straight back to min_period. The period then picks the operation mode (Table 11):
+#   period < 1 s            continuous conversion
+#   1 s <= period < 5 s     1 SPS, lower average current
+#   period >= 5 s           one shot per sample; the part shuts down after each conversion
+# error_bound is in the units of ADT7420.temp (deg F).
+########################################################################################################################
+
+import time
+from ADT7420 import *
+
+ADP_PERIOD_1SPS = 1.0
+ADP_PERIOD_ONE_SHOT = 5.0
+ADP_ALPHA = 0.3
+ADP_RATE_MIN = 1e-6
+ADP_MSG_STATS = 'Adaptive'
+
+
+class AdaptiveSampler:
+    def __init__(self, sensor, error_bound=0.1, min_period=ADT7420.I2C_CONV_TIME, max_period=60.0):
+        self.sensor = sensor
+        self.error_bound = error_bound
+        self.min_period = min_period
+        self.max_period = max_period
+        self.mode = None
+        self.rate = 0.0
+        self.last = None
+        self.samples = 0
+        self.timeouts = 0
+        self.start = None
+        self.modes = dict()
+
+    def choose_mode(self, period):
+        if period >= ADP_PERIOD_ONE_SHOT:
+            return ADT7420.I2C_OP_ONE_SHOT
+        if period >= ADP_PERIOD_1SPS:
+            return ADT7420.I2C_OP_1SPS
+        return ADT7420.I2C_OP_CONTINUOUS
+
+    def set_mode(self, mode):
+        if mode != self.mode and mode != ADT7420.I2C_OP_ONE_SHOT:
+            self.sensor.set_op_mode(mode)
+        self.mode = mode
+
+    def next_period(self):
+        s = self.sensor
+        if self.last is None:
+            return self.min_period
+
+        t0, v0 = self.last
+        dt = s.time - t0
+        if dt <= 0:
+            return self.min_period
+        predicted = v0 + self.rate * dt
+        self.rate += ADP_ALPHA * ((s.temp - v0) / dt - self.rate)
+        if abs(s.temp - predicted) > self.error_bound:
+            return self.min_period
+        return min(max(self.error_bound / max(abs(self.rate), ADP_RATE_MIN), self.min_period), self.max_period)
+
+    def sample(self):
+        s = self.sensor
+        if self.mode == ADT7420.I2C_OP_ONE_SHOT:
+            s.set_op_mode(ADT7420.I2C_OP_ONE_SHOT)
+            # The registers still hold the previous conversion; retry at min_period rather than log it as new
+            if not s.wait_ready(ADT7420.I2C_RDY_TIMEOUT):
+                self.timeouts += 1
+                s.sched.period = self.min_period
+                return
+        s.read()
+        s.log_data()
+        self.samples += 1
+        self.modes[self.mode] = self.modes.get(self.mode, 0) + 1
+
+        period = self.next_period()
+        self.last = (s.time, s.temp)
+        self.set_mode(self.choose_mode(period))
+        s.sched.period = period
+
+    def stats(self):
+        elapsed = time.monotonic() - self.start if self.start is not None else 0.0
+        baseline = max(elapsed / self.min_period, self.samples, 1)
+        return dict(samples=self.samples, baseline=int(baseline), reduction=1 - self.samples / baseline,
+                    period=self.sensor.sched.period, timeouts=self.timeouts)
+
+    def report(self):
+        st = self.stats()
+        return '{0}, samples {1}, fixed rate {2}, reduction {3:.1%}, period {4:.3f}s, ready timeouts {5}'.format(
+            ADP_MSG_STATS, st['samples'], st['baseline'], st['reduction'], st['period'], st['timeouts'])
+
+    def monitor(self):
+        self.start = time.monotonic()
+        self.set_mode(ADT7420.I2C_OP_CONTINUOUS)
+        self.sensor.sched.period = self.min_period
+        self.sensor.sched.start()
+        try:
+            while True:
+                self.sample()
+                self.sensor.sched.wait()
+
+        except KeyboardInterrupt:
+            pass
+
+        self.set_mode(ADT7420.I2C_OP_CONTINUOUS)
+        if self.sensor.con:
+            print(self.report())
+
+
+def mon_adaptive():
+    ts = ADT7420(1, 0x49, ADT7420.I2C_CONV_TIME, '/home/pi/temp_mon.csv', True)
+    AdaptiveSampler(ts).monitor()
+
+
+def main():
+    mon_adaptive()
+
+
+if __name__ == "__main__":
+    main()
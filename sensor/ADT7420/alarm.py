@@ -0,0 +1,131 @@
+########################################################################################################################
+# THIS IS AN UNPUBLISHED WORK CONTAINING Rohit Priyadarshi's CONFIDENTIAL AND PROPRIETARY INFORMATION, CREATED IN 2018
+#
+# I have worked very hard to create a quality product and wish to realize the fair fruits of my labor. I therefore
+# insist that you honor my copyright. This material is provided 'as is', with absolutely no warranty expressed or
+# implied. However, I want to encourage the use of my product in all possible circumstances and will work very hard to
+# meet your needs if you will contact me at rohit@rishkan.com and ask for permission.
+########################################################################################################################
+
+########################################################################################################################
+# Hardware threshold alarms
+#
+# The ADT7420 compares every conversion against T_HIGH/T_LOW (INT pin) and T_CRIT (CT pin) on its own, so alarms need
+# no polling. program() stages the setpoints 0x04 - 0x0A and the fault queue, pin polarities and INT/CT mode bits of the
+# configuration register (Table 11) in the sensor's register map and writes 0x03 - 0x0A in one block write. start()
+# registers pigpio edge callbacks on the GPIOs wired to INT and CT; pigpio timestamps edges in microseconds, and the
+# callback runs without any I2C traffic.
+#
+# INT/CT pins are open drain, so the GPIOs get a pull-up. In interrupt mode INT stays asserted until the status
+# register is read (clear()); in comparator mode the pins follow the temperature with T_HYST hysteresis. CT is always
+# in comparator mode. Any status read releases INT and clears the flags, so in interrupt mode program() drops the
+# status byte from the sensor's burst read and i2c_data.status stays 0; sync_ready (wait_ready) polls the status
+# register and must not be combined with interrupt mode alarms.
+########################################################################################################################
+
+import collections
+import time
+
+ALM_T_HYST_MAX = 15
+ALM_FAULT_QUEUE_MAX = 4
+
+ALM_CFG_FAULT_QUEUE = 0b00000011
+ALM_CFG_CT_POL = 0b00000100
+ALM_CFG_INT_POL = 0b00001000
+ALM_CFG_CMP_MODE = 0b00010000
+ALM_CFG_MASK = ALM_CFG_FAULT_QUEUE | ALM_CFG_CT_POL | ALM_CFG_INT_POL | ALM_CFG_CMP_MODE
+
+ALM_STATUS_T_LOW = 0b00010000
+ALM_STATUS_T_HIGH = 0b00100000
+ALM_STATUS_T_CRIT = 0b01000000
+
+ALM_PIN_INT = 'INT'
+ALM_PIN_CT = 'CT'
+ALM_LEVEL_TIMEOUT = 2  # pigpio watchdog, not an edge
+
+AlarmEvent = collections.namedtuple('AlarmEvent', ['pin', 'active', 'tick', 'time'])
+
+
+class AlarmError(Exception):
+    pass
+
+
+class Alarm:
+    def __init__(self, sensor, t_high=64, t_low=10, t_crit=147, t_hyst=5, fault_queue=1, comparator=False,
+                 int_active_high=False, ct_active_high=False, int_gpio=None, ct_gpio=None, callback=None):
+        if not 0 <= t_hyst <= ALM_T_HYST_MAX:
+            raise AlarmError('T_HYST must be 0 - {0} deg C'.format(ALM_T_HYST_MAX))
+        if not 1 <= fault_queue <= ALM_FAULT_QUEUE_MAX:
+            raise AlarmError('Fault queue must be 1 - {0}'.format(ALM_FAULT_QUEUE_MAX))
+        self.sensor = sensor
+        self.t_high = t_high
+        self.t_low = t_low
+        self.t_crit = t_crit
+        self.t_hyst = t_hyst
+        self.fault_queue = fault_queue
+        self.comparator = comparator
+        self.int_active_high = int_active_high
+        self.ct_active_high = ct_active_high
+        self.int_gpio = int_gpio
+        self.ct_gpio = ct_gpio
+        self.callback = callback
+        self.callbacks = []
+
+    def config_bits(self):
+        bits = self.fault_queue - 1
+        if self.ct_active_high:
+            bits |= ALM_CFG_CT_POL
+        if self.int_active_high:
+            bits |= ALM_CFG_INT_POL
+        if self.comparator:
+            bits |= ALM_CFG_CMP_MODE
+        return bits
+
+    def program(self):
+        regs = self.sensor.regs
+        regs.t_high = self.t_high
+        regs.t_low = self.t_low
+        regs.t_crit = self.t_crit
+        regs.t_hyst = int(self.t_hyst)
+        cfg = regs[self.sensor.I2C_REG_CONFIG]
+        regs[self.sensor.I2C_REG_CONFIG] = (cfg & ~ALM_CFG_MASK) | self.config_bits()
+        regs.flush()
+        # In interrupt mode the sampling loop must leave the status register alone, or it clears the latched alarm
+        s = self.sensor
+        s.i2c_burst = s.I2C_BURST_TEMP if self.comparator else s.I2C_BURST_NO_STATUS
+
+    def start(self):
+        pi = self.sensor.dev_bus.gpio()
+        if pi is None:
+            raise AlarmError('Bus backend has no GPIO access')
+        import pigpio
+        for pin, gpio in ((ALM_PIN_INT, self.int_gpio), (ALM_PIN_CT, self.ct_gpio)):
+            if gpio is None:
+                continue
+            pi.set_mode(gpio, pigpio.INPUT)
+            pi.set_pull_up_down(gpio, pigpio.PUD_UP)
+            self.callbacks.append(pi.callback(gpio, pigpio.EITHER_EDGE, self.edge_handler(pin)))
+
+    def stop(self):
+        for cb in self.callbacks:
+            cb.cancel()
+        self.callbacks = []
+
+    def edge_handler(self, pin):
+        active_high = self.int_active_high if pin == ALM_PIN_INT else self.ct_active_high
+
+        def handler(gpio, level, tick):
+            if level == ALM_LEVEL_TIMEOUT:
+                return
+            event = AlarmEvent(pin, bool(level) == active_high, tick, time.time())
+            if self.callback:
+                self.callback(event)
+
+        return handler
+
+    # One status read; also releases INT in interrupt mode
+    def clear(self):
+        s = self.sensor
+        status = s.dev_bus.read_byte(s.dev_temp, s.I2C_REG_STATUS)
+        return dict(t_low=bool(status & ALM_STATUS_T_LOW), t_high=bool(status & ALM_STATUS_T_HIGH),
+                    t_crit=bool(status & ALM_STATUS_T_CRIT))
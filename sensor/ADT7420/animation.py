@@ -1,55 +1,158 @@
 """
 Emulate an oscilloscope.  Requires the animation API introduced in
 matplotlib 1.0 SVN.
+
+Samples are taken by background reader threads into fixed size NumPy ring
+buffers, one per sensor.  Every frame the visible window is reduced with
+min/max decimation to at most two points per pixel column, and the x axis is
+time relative to now, so the axes never change and every frame is blitted.
 """
 
+import threading
+import time
 import numpy as np
 from matplotlib.lines import Line2D
 import matplotlib.pyplot as plt
 import matplotlib.animation as animation
 from ADT7420 import *
+import daemon
+
+SCOPE_FPS = 20
+SCOPE_RATE_MAX = 1000  # samples/s a buffer is sized for
+
+
+class ScopeBuffer:
+    def __init__(self, capacity):
+        self.t = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.capacity = capacity
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def append(self, t, y):
+        with self.lock:
+            i = self.count % self.capacity
+            self.t[i] = t
+            self.y[i] = y
+            self.count += 1
+
+    def extend(self, t, y):
+        with self.lock:
+            n = min(len(t), self.capacity)
+            idx = np.arange(self.count + len(t) - n, self.count + len(t)) % self.capacity
+            self.t[idx] = t[-n:]
+            self.y[idx] = y[-n:]
+            self.count += len(t)
+
+    def since(self, t0):
+        with self.lock:
+            n = min(self.count, self.capacity)
+            idx = np.arange(self.count - n, self.count) % self.capacity
+            t = self.t[idx]
+            y = self.y[idx]
+        start = np.searchsorted(t, t0)
+        return t[start:], y[start:]
+
+
+def minmax_decimate(t, y, width):
+    n = len(t) // width
+    if n < 3:
+        return t, y
+    t = t[len(t) - n * width:].reshape(width, n)
+    y = y[len(y) - n * width:].reshape(width, n)
+    lo = y.argmin(axis=1)
+    hi = y.argmax(axis=1)
+    first = np.minimum(lo, hi)
+    second = np.maximum(lo, hi)
+    rows = np.arange(width)
+    td = np.empty(2 * width)
+    yd = np.empty(2 * width)
+    td[0::2] = t[rows, first]
+    td[1::2] = t[rows, second]
+    yd[0::2] = y[rows, first]
+    yd[1::2] = y[rows, second]
+    return td, yd
+
+
+# Owns a sensor and samples it on its own schedule.
+class SensorReader(threading.Thread):
+    def __init__(self, sensor, buf):
+        threading.Thread.__init__(self, daemon=True)
+        self.sensor = sensor
+        self.buf = buf
+
+    def run(self):
+        self.sensor.sched.start()
+        while True:
+            self.sensor.read()
+            self.sensor.log_data()
+            self.buf.append(self.sensor.time, self.sensor.temp)
+            self.sensor.sched.wait()
+
+
+# Follows a running sensor daemon's ring without touching I2C.
+class RingReader(threading.Thread):
+    def __init__(self, bus, addr, buf, poll=1.0 / SCOPE_FPS):
+        threading.Thread.__init__(self, daemon=True)
+        self.ring, _ = daemon.connect(bus, addr)
+        self.buf = buf
+        self.poll = poll
+
+    def run(self):
+        seq = max(self.ring.write_seq() - self.ring.capacity + 1, 0)
+        for recs in daemon.follow(self.ring, seq, self.poll):
+            self.buf.extend(recs['time'], recs['temp'])
 
 
 class Scope:
-    def __init__(self, ax, maxt=2, dt=0.02):
+    def __init__(self, ax, bufs, maxt=60):
         self.ax = ax
-        self.dt = dt
         self.maxt = maxt
-        self.tdata = [0]
-        self.ydata = [0]
-        self.line = Line2D(self.tdata, self.ydata)
-        self.ax.add_line(self.line)
+        self.bufs = bufs
+        self.lines = []
+        for _ in bufs:
+            line = Line2D([], [], animated=True)
+            self.ax.add_line(line)
+            self.lines.append(line)
         self.ax.set_ylim(-.1, 150.1)
-        self.ax.set_xlim(0, self.maxt)
+        self.ax.set_xlim(-self.maxt, 0)
 
-    def update(self, y):
-        lastt = self.tdata[-1]
-        if lastt > self.tdata[0] + self.maxt: # reset the arrays
-            self.tdata = [self.tdata[-1]]
-            self.ydata = [self.ydata[-1]]
-            self.ax.set_xlim(self.tdata[0], self.tdata[0] + self.maxt)
-            self.ax.figure.canvas.draw()
+    def width(self):
+        return max(int(self.ax.get_window_extent().width), 1)
 
-        t = self.tdata[-1] + self.dt
-        self.tdata.append(t)
-        self.ydata.append(y)
-        self.line.set_data(self.tdata, self.ydata)
-        return self.line,
+    def update(self, frame):
+        now = time.time()
+        width = self.width()
+        for buf, line in zip(self.bufs, self.lines):
+            t, y = buf.since(now - self.maxt)
+            t, y = minmax_decimate(t, y, width)
+            line.set_data(t - now, y)
+        return self.lines
 
 
-def emitter():
-    while True:
-        ts.read_once()
-        yield ts.temp
+def scope_buffer(maxt, period):
+    return ScopeBuffer(int(maxt * min(1.0 / period, SCOPE_RATE_MAX)) + 1)
 
 
-ts = ADT7420(1, 0x49, .240, '/home/pi/temp_mon.csv', False)
-fig, ax = plt.subplots()
-scope = Scope(ax)
+def main():
+    maxt = 600
+    bus, addr = 1, 0x49
+    # With a sensor daemon running the scope follows its ring; otherwise it owns the sensor itself
+    info = daemon.probe(daemon.sock_path(bus, addr))
+    if info is not None:
+        buf = scope_buffer(maxt, info['period'])
+        RingReader(bus, addr, buf).start()
+    else:
+        ts = ADT7420(bus, addr, .240, '/home/pi/temp_mon.csv', False)
+        buf = scope_buffer(maxt, ts.i2c_delay)
+        SensorReader(ts, buf).start()
+    bufs = [buf]
 
-# pass a generator in "emitter" to produce data for the update func
-ani = animation.FuncAnimation(fig, scope.update, emitter, interval=240,
-    blit=True)
+    fig, ax = plt.subplots()
+    scope = Scope(ax, bufs, maxt)
+    ani = animation.FuncAnimation(fig, scope.update, interval=1000 / SCOPE_FPS, blit=True)
+    plt.show()
 
 
-plt.show()
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+########################################################################################################################
+# THIS IS AN UNPUBLISHED WORK CONTAINING Rohit Priyadarshi's CONFIDENTIAL AND PROPRIETARY INFORMATION, CREATED IN 2018
+#
+# I have worked very hard to create a quality product and wish to realize the fair fruits of my labor. I therefore
+# insist that you honor my copyright. This material is provided 'as is', with absolutely no warranty expressed or
+# implied. However, I want to encourage the use of my product in all possible circumstances and will work very hard to
+# meet your needs if you will contact me at rohit@rishkan.com and ask for permission.
+########################################################################################################################
+
+########################################################################################################################
+# Compressed long-term archive
+#
+# Timestamps are quantized to integer ticks (ARC_TICKS per second) and raw codes are taken as signed 16-bit values.
+# Samples are grouped into blocks; within a block the time stream is stored as delta-of-delta (a steady sample period
+# encodes as zeros) and the code stream as deltas, both zigzag mapped and LEB128 varint packed. A slowly moving 4 SPS
+# temperature costs about 2 bytes per sample against about 30 for the CSV.
+#
+# File:   ARC_FILE_HDR   magic 'ADTA', version, ticks per second
+# Block:  ARC_BLOCK_HDR  count, payload bytes, first tick, last tick, first code, min code, max code
+#         payload        varint(zigzag(time dd)) * (count - 1), varint(zigzag(code delta)) * (count - 1)
+#
+# The block headers carry the time span and code range, so blocks(t0, t1) skips everything outside a query without
+# touching the payload. Encoding is vectorized with NumPy one block at a time. read() decodes in bulk: the payloads of
+# every block in range are read at once and decoded ARC_DECODE_BATCH samples at a time, whatever the block size; the
+# combined varint streams of a batch go through one varint_split and each stream through one cumsum that restarts at
+# every block start. A batch stays in cache, where a single pass over the whole range would run at memory speed.
+#
+#   python3 archive.py <temp_mon.csv or .bin> <out.adta>     convert a log and report size and decode rate
+########################################################################################################################
+
+import os
+import struct
+import sys
+import time
+import numpy as np
+from samplelog import read_log
+
+ARC_MAGIC = b'ADTA'
+ARC_VERSION = 1
+ARC_TICKS = 1000
+ARC_BLOCK = 4096
+ARC_DECODE_BATCH = 65536  # samples per bulk decode; a batch much larger than this falls out of cache
+ARC_FILE_HDR = struct.Struct('<4sBI')
+ARC_BLOCK_HDR = struct.Struct('<IIqqhhh')
+ARC_VARINT_MAX = 10
+
+
+class ArchiveError(Exception):
+    pass
+
+
+def zigzag(v):
+    v = v.astype(np.int64)
+    return ((v << 1) ^ (v >> 63)).astype(np.uint64)
+
+
+# Works at the width of u, so the one byte varints can be unzigzagged as bytes
+def unzigzag(u):
+    one = u.dtype.type(1)
+    v = u >> one
+    sign = u & one
+    np.negative(sign, out=sign)
+    v ^= sign
+    return v.view('i{0}'.format(u.dtype.itemsize))
+
+
+def varint_encode(u):
+    lengths = np.ones(len(u), dtype=np.int64)
+    for k in range(1, ARC_VARINT_MAX):
+        lengths += u >= np.uint64(1 << (7 * k))
+    offsets = np.cumsum(lengths) - lengths
+    out = np.zeros(int(lengths.sum()), dtype=np.uint8)
+    for k in range(int(lengths.max()) if len(u) else 0):
+        mask = lengths > k
+        byte = (u[mask] >> np.uint64(7 * k)) & np.uint64(0x7F)
+        byte |= np.where(lengths[mask] > k + 1, np.uint64(0x80), np.uint64(0))
+        out[offsets[mask] + k] = byte
+    return out
+
+
+# Splits a varint stream into the last byte of each of the first count values, which is the whole value for the one
+# byte varints (nearly all of them), and the index and value of every longer one. Continuation bytes are few: each
+# belongs to the value numbered by its position less the continuation bytes before it.
+def varint_split(b, count):
+    cont = np.flatnonzero(b >= 0x80)
+    if not len(cont) or cont[0] >= count:
+        if len(b) < count:
+            raise ArchiveError('Truncated varint stream')
+        return b[:count], np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.uint64), count
+    j = cont - np.arange(len(cont))
+    cont, j = cont[j < count], j[j < count]
+    used = count + len(cont)
+    if len(b) < used or b[used - 1] >= 0x80:
+        raise ArchiveError('Truncated varint stream')
+    first = np.flatnonzero(np.diff(j, prepend=-1))
+    starts = cont[first]
+    lengths = np.diff(first, append=len(j)) + 1
+    v = (b[starts] & 0x7F).astype(np.uint64)
+    more = np.arange(len(starts))
+    for k in range(1, int(lengths.max())):
+        more = more[lengths[more] > k]
+        v[more] |= (b[starts[more] + k] & 0x7F).astype(np.uint64) << np.uint64(7 * k)
+    return np.delete(b[:used], cont), j[first], v, used
+
+
+def varint_decode(b, count):
+    last, idx, vals, used = varint_split(b, count)
+    u = last.astype(np.uint64)
+    u[idx] = vals
+    return u, used
+
+
+def encode_block(times, codes):
+    ticks = np.round(np.asarray(times) * ARC_TICKS).astype(np.int64)
+    codes = np.asarray(codes, dtype=np.uint16).view(np.int16).astype(np.int64)
+    d = np.diff(ticks)
+    dd = np.diff(d, prepend=0)
+    payload = np.concatenate((varint_encode(zigzag(dd)), varint_encode(zigzag(np.diff(codes))))).tobytes()
+    hdr = ARC_BLOCK_HDR.pack(len(ticks), len(payload), int(ticks[0]), int(ticks[-1]), int(codes[0]), int(codes.min()),
+                             int(codes.max()))
+    return hdr + payload
+
+
+def decode_block(count, payload, t_first, c_first):
+    return decode_blocks([count], [payload], [t_first], [c_first])
+
+
+# Running sum of x that restarts at every index in starts, with x[starts] replaced by init: subtracting each run's
+# total at the start of the next lets a single cumsum over the whole array restart at every block
+def run_cumsum(x, starts, init):
+    x[starts] = init
+    totals = np.add.reduceat(x, starts, dtype=x.dtype)
+    x[starts[1:]] -= totals[:-1]
+    return np.cumsum(x, dtype=x.dtype, out=x)
+
+
+# Decodes a run of blocks in one pass. A zero byte is put in front of each payload twice, so every block decodes to
+# [0, 0, time dd * (count - 1), code delta * (count - 1)]: one slot for the first code, one for the first tick, and
+# the time and code streams then each come out count long with a slot at every block start. The one byte values are
+# unzigzagged and split into the two streams as bytes; the few longer ones are put in place afterwards. Codes are
+# summed as int16, where wrapping around gives the same codes back.
+def decode_blocks(counts, payloads, t_firsts, c_firsts):
+    counts = np.asarray(counts, dtype=np.int64)
+    b = np.frombuffer(b''.join(b'\0\0' + p for p in payloads), dtype=np.uint8)
+    last, idx, vals, used = varint_split(b, int(2 * counts.sum()))
+    if used != len(b):
+        raise ArchiveError('Block payloads hold {0} bytes beyond their samples'.format(len(b) - used))
+    is_time = np.repeat(np.tile(np.array([False, True, False]), len(counts)),
+                        np.stack((np.ones_like(counts), counts, counts - 1), axis=1).ravel())
+    small = unzigzag(last)
+    d = small[is_time].astype(np.int64)
+    codes = small[~is_time].astype(np.int16)
+    starts = np.cumsum(counts) - counts
+    if len(idx):
+        blk = np.searchsorted(starts, idx // 2, 'right') - 1
+        k = idx - 2 * starts[blk]
+        vals = unzigzag(vals)
+        t = k <= counts[blk]
+        d[starts[blk[t]] + k[t] - 1] = vals[t]
+        c = ~t
+        codes[starts[blk[c]] + k[c] - counts[blk[c]]] = vals[c].astype(np.int16)
+    ticks = run_cumsum(run_cumsum(d, starts, 0), starts, np.asarray(t_firsts, dtype=np.int64))
+    codes = run_cumsum(codes, starts, np.asarray(c_firsts, dtype=np.int16))
+    return ticks / ARC_TICKS, codes.view(np.uint16)
+
+
+class ArchiveWriter:
+    def __init__(self, path, block=ARC_BLOCK):
+        self.f = open(path, 'ab')
+        if self.f.tell() == 0:
+            self.f.write(ARC_FILE_HDR.pack(ARC_MAGIC, ARC_VERSION, ARC_TICKS))
+        self.block = block
+        self.times = np.zeros(block)
+        self.codes = np.zeros(block, dtype=np.uint16)
+        self.count = 0
+
+    def __call__(self, sensor):
+        self.append(sensor.time, sensor.i2c_data.code())
+
+    def append(self, t, code):
+        self.times[self.count] = t
+        self.codes[self.count] = code
+        self.count += 1
+        if self.count == self.block:
+            self.flush()
+
+    def extend(self, times, codes):
+        self.flush()
+        for i in range(0, len(times), self.block):
+            self.f.write(encode_block(times[i:i + self.block], codes[i:i + self.block]))
+
+    def flush(self):
+        if self.count:
+            self.f.write(encode_block(self.times[:self.count], self.codes[:self.count]))
+            self.count = 0
+        self.f.flush()
+
+    def close(self):
+        self.flush()
+        self.f.close()
+
+
+def clip(times, codes, t0=None, t1=None):
+    if t0 is None and t1 is None:
+        return times, codes
+    keep = np.ones(len(times), dtype=bool)
+    if t0 is not None:
+        keep &= times >= t0
+    if t1 is not None:
+        keep &= times < t1
+    return times[keep], codes[keep]
+
+
+# Groups block headers into runs of about ARC_DECODE_BATCH samples for decode_blocks()
+def decode_batches(hdrs, size=ARC_DECODE_BATCH):
+    batch = []
+    n = 0
+    for h in hdrs:
+        batch.append(h)
+        n += h[0]
+        if n >= size:
+            yield batch
+            batch = []
+            n = 0
+    if batch:
+        yield batch
+
+
+class ArchiveReader:
+    def __init__(self, path):
+        self.f = open(path, 'rb')
+        magic, version, ticks = ARC_FILE_HDR.unpack(self.f.read(ARC_FILE_HDR.size))
+        if magic != ARC_MAGIC or version != ARC_VERSION or ticks != ARC_TICKS:
+            raise ArchiveError('Not a version {0} archive: {1}'.format(ARC_VERSION, path))
+
+    def headers(self):
+        # Yields (count, payload offset, payload bytes, first tick, last tick, first code, min code, max code)
+        self.f.seek(ARC_FILE_HDR.size)
+        while True:
+            raw = self.f.read(ARC_BLOCK_HDR.size)
+            if len(raw) < ARC_BLOCK_HDR.size:
+                return
+            count, size, t_first, t_last, c_first, c_min, c_max = ARC_BLOCK_HDR.unpack(raw)
+            yield count, self.f.tell(), size, t_first, t_last, c_first, c_min, c_max
+            self.f.seek(size, 1)
+
+    def in_range(self, t0, t1):
+        return [h for h in self.headers() if (t0 is None or h[4] >= t0 * ARC_TICKS) and
+                (t1 is None or h[3] < t1 * ARC_TICKS)]
+
+    def blocks(self, t0=None, t1=None):
+        for count, offset, size, t_first, _, c_first, _, _ in self.in_range(t0, t1):
+            self.f.seek(offset)
+            yield clip(*decode_block(count, self.f.read(size), t_first, c_first), t0=t0, t1=t1)
+
+    def read(self, t0=None, t1=None):
+        hdrs = self.in_range(t0, t1)
+        n = sum(h[0] for h in hdrs)
+        times = np.empty(n)
+        codes = np.empty(n, dtype=np.uint16)
+        if not hdrs:
+            return times, codes
+        # One read from the first payload to the end of the last; the block headers in between are cut out
+        begin = hdrs[0][1]
+        self.f.seek(begin)
+        span = memoryview(self.f.read(hdrs[-1][1] + hdrs[-1][2] - begin))
+        done = 0
+        for batch in decode_batches(hdrs):
+            t, c = decode_blocks([h[0] for h in batch], [span[h[1] - begin:h[1] - begin + h[2]] for h in batch],
+                                 [h[3] for h in batch], [h[5] for h in batch])
+            times[done:done + len(t)] = t
+            codes[done:done + len(c)] = c
+            done += len(t)
+        return clip(times, codes, t0, t1)
+
+    def close(self):
+        self.f.close()
+
+
+def main():
+    src, dst = sys.argv[1], sys.argv[2]
+    recs = read_log(src)
+    w = ArchiveWriter(dst)
+    w.extend(recs['time'], recs['code'])
+    w.close()
+
+    r = ArchiveReader(dst)
+    start = time.perf_counter()
+    times, codes = r.read()
+    elapsed = time.perf_counter() - start
+    r.close()
+    size = os.path.getsize(dst)
+    print('{0}: {1} samples, {2} bytes, {3:.2f} bytes/sample, decode {4:.1f} Msamples/s'.format(
+        dst, len(codes), size, size / max(len(codes), 1), len(codes) / max(elapsed, 1e-9) / 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+########################################################################################################################
+# THIS IS AN UNPUBLISHED WORK CONTAINING Rohit Priyadarshi's CONFIDENTIAL AND PROPRIETARY INFORMATION, CREATED IN 2018
+#
+# I have worked very hard to create a quality product and wish to realize the fair fruits of my labor. I therefore
+# insist that you honor my copyright. This material is provided 'as is', with absolutely no warranty expressed or
+# implied. However, I want to encourage the use of my product in all possible circumstances and will work very hard to
+# meet your needs if you will contact me at rohit@rishkan.com and ask for permission.
+########################################################################################################################
+
+########################################################################################################################
+# Acquisition pipeline benchmark
+#
+# Runs read() -> read_i2c -> I2CData.convert -> read_time -> log_data on the simulated bus and reports
+#   pipeline    samples/s and the per-stage latency table from Profiler
+#   memory      blocks and bytes still allocated per sample after a run (tracemalloc snapshot diff), and the
+#               transient high-water mark of the run
+#   sensors     samples/s as the number of virtual sensors grows
+#   rate        achieved rate, missed deadlines and jitter of the scheduled read_once() loop at increasing rates
+#
+#   python3 benchmark.py [samples]
+########################################################################################################################
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from ADT7420 import *
+from profiler import Profiler
+from simulator import SimBus
+
+BEN_SAMPLES = 20000
+BEN_SENSORS = (1, 10, 100, 1000)
+BEN_RATES = (4, 100, 1000)
+BEN_RATE_TIME = 2.0
+
+
+def sensors(n, path):
+    backend = SimBus()
+    return [ADT7420(1 + i // 4, 0x48 + i % 4, 0, os.path.join(path, 'bench_{0}.csv'.format(i)), False, backend=backend)
+            for i in range(n)]
+
+
+def run(ts, n):
+    for _ in range(n):
+        ts.read()
+        ts.log_data()
+
+
+def bench_pipeline(path, n):
+    ts = sensors(1, path)[0]
+    ts.profiler = Profiler()
+    run(ts, n // 10)
+    ts.profiler.reset()
+
+    start = time.perf_counter()
+    for _ in range(n):
+        ts.read()
+        t = ts.profiler.clock()
+        ts.log_data()
+        ts.profiler.mark('log_data', t)
+    elapsed = time.perf_counter() - start
+    print('pipeline: {0} samples in {1:.2f} s, {2:.0f} samples/s (profiled)'.format(n, elapsed, n / elapsed))
+    print(ts.profiler.report())
+
+    ts.profiler = None
+    start = time.perf_counter()
+    run(ts, n)
+    elapsed = time.perf_counter() - start
+    print('pipeline: {0:.0f} samples/s (unprofiled)'.format(n / elapsed))
+
+
+def bench_memory(path, n):
+    ts = sensors(1, path)[0]
+    run(ts, n // 10)
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    run(ts, n)
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    diff = after.compare_to(before, 'filename')
+    blocks = sum(d.count_diff for d in diff)
+    size = sum(d.size_diff for d in diff)
+    print('memory: {0:.3f} blocks and {1:.1f} bytes retained per sample over {2} samples, '
+          'transient high-water mark {3} bytes'.format(blocks / n, size / n, n, peak))
+
+
+def bench_sensors(path, n):
+    for count in BEN_SENSORS:
+        group = sensors(count, path)
+        rounds = max(n // count, 1)
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for ts in group:
+                ts.read()
+                ts.log_data()
+        elapsed = time.perf_counter() - start
+        print('sensors: {0:>5} sensors, {1:.0f} samples/s'.format(count, rounds * count / elapsed))
+        del group
+
+
+def bench_rate(path):
+    for rate in BEN_RATES:
+        ts = sensors(1, path)[0]
+        ts.sched.period = 1.0 / rate
+        ts.sched.start()
+        end = time.monotonic() + BEN_RATE_TIME
+        while time.monotonic() < end:
+            ts.read_once()
+        st = ts.sched.stats()
+        print('rate: {0:>5} Hz target, {1:.1f} Hz achieved, missed {2}, jitter mean {3:.1f} us max {4:.1f} us'.format(
+            rate, st['ticks'] / BEN_RATE_TIME, st['missed'], st['jitter_mean'] * 1e6, st['jitter_max'] * 1e6))
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else BEN_SAMPLES
+    with tempfile.TemporaryDirectory() as path:
+        bench_pipeline(path, n)
+        bench_memory(path, n)
+        bench_sensors(path, n)
+        bench_rate(path)
+
+
+if __name__ == "__main__":
+    main()
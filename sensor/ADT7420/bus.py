@@ -0,0 +1,210 @@
+########################################################################################################################
+# THIS IS AN UNPUBLISHED WORK CONTAINING Rohit Priyadarshi's CONFIDENTIAL AND PROPRIETARY INFORMATION, CREATED IN 2018
+#
+# I have worked very hard to create a quality product and wish to realize the fair fruits of my labor. I therefore
+# insist that you honor my copyright. This material is provided 'as is', with absolutely no warranty expressed or
+# implied. However, I want to encourage the use of my product in all possible circumstances and will work very hard to
+# meet your needs if you will contact me at rohit@rishkan.com and ask for permission.
+########################################################################################################################
+
+########################################################################################################################
+# I2C bus backends
+#
+# The ADT7420 auto-increments its address pointer on reads, so a single block read starting at 0x00 returns the
+# temperature MSB, LSB and status (and the rest of the register file when asked) from the same conversion in one I2C
+# transaction and one pigpiod round trip.
+########################################################################################################################
+
+import threading
+import time
+
+BUS_REG_FILE_SIZE = 0x0C  # 0x00 - 0x0B, Table 6
+
+
+class I2CBusError(IOError):
+    pass
+
+
+# Interface every bus backend implements. Handles are opaque to the caller.
+class I2CBus:
+    def open(self, bus, addr, flags=0):
+        raise NotImplementedError
+
+    def close(self, handle):
+        raise NotImplementedError
+
+    def read_byte(self, handle, reg):
+        raise NotImplementedError
+
+    def write_byte(self, handle, reg, value):
+        raise NotImplementedError
+
+    def read_block(self, handle, reg, count):
+        raise NotImplementedError
+
+    def write_block(self, handle, reg, data):
+        raise NotImplementedError
+
+    # pigpio.pi for GPIO callbacks, None when the backend has no GPIO access
+    def gpio(self):
+        return None
+
+    # Timestamp for a sample just read from handle; replay backends return the recorded time
+    def now(self, handle):
+        return time.time()
+
+    def stop(self):
+        pass
+
+
+# Backend talking to a pigpiod daemon, locally or over the network.
+class PigpioBus(I2CBus):
+    def __init__(self, host=None, port=None):
+        import pigpio
+        self.pigpio = pigpio
+        if host is None:
+            self.pi = pigpio.pi()
+        elif port is None:
+            self.pi = pigpio.pi(host)
+        else:
+            self.pi = pigpio.pi(host, port)
+        if not self.pi.connected:
+            raise I2CBusError('Unable to connect to pigpiod')
+
+    def open(self, bus, addr, flags=0):
+        return self.pi.i2c_open(bus, addr, flags)
+
+    def close(self, handle):
+        return self.pi.i2c_close(handle)
+
+    def read_byte(self, handle, reg):
+        return self.pi.i2c_read_byte_data(handle, reg)
+
+    def write_byte(self, handle, reg, value):
+        return self.pi.i2c_write_byte_data(handle, reg, value)
+
+    def read_block(self, handle, reg, count):
+        n, data = self.pi.i2c_read_i2c_block_data(handle, reg, count)
+        if n != count:
+            raise I2CBusError('Short block read at {0}: {1} of {2} bytes'.format(hex(reg), n, count))
+        return data
+
+    def write_block(self, handle, reg, data):
+        return self.pi.i2c_write_i2c_block_data(handle, reg, data)
+
+    def gpio(self):
+        return self.pi
+
+    def stop(self):
+        self.pi.stop()
+
+
+# In-memory backend. Each open device is a plain 16 byte register file, and every call counts as one transaction so
+# the cost of a read path can be measured without hardware.
+class FakeBus(I2CBus):
+    REG_FILE_SIZE = 0x10
+
+    def __init__(self, regs=None):
+        self.regs = dict(regs or {})
+        self.handles = dict()
+        self.next_handle = 0
+        self.transactions = 0
+
+    def device(self, bus, addr):
+        key = (bus, addr)
+        if key not in self.regs:
+            self.regs[key] = bytearray(self.REG_FILE_SIZE)
+        return self.regs[key]
+
+    def open(self, bus, addr, flags=0):
+        handle = self.next_handle
+        self.next_handle += 1
+        self.handles[handle] = self.device(bus, addr)
+        return handle
+
+    def close(self, handle):
+        del self.handles[handle]
+        return 0
+
+    def read_byte(self, handle, reg):
+        self.transactions += 1
+        return self.handles[handle][reg]
+
+    def write_byte(self, handle, reg, value):
+        self.transactions += 1
+        self.handles[handle][reg] = value & 0xFF
+        return 0
+
+    def read_block(self, handle, reg, count):
+        self.transactions += 1
+        return bytearray(self.handles[handle][reg:reg + count])
+
+    def write_block(self, handle, reg, data):
+        self.transactions += 1
+        self.handles[handle][reg:reg + len(data)] = data
+        return 0
+
+
+# Serializes transactions per physical I2C bus while letting different buses proceed in parallel. Any backend can be
+# wrapped; the pigpio library already serializes its socket, this keeps a whole transaction on a bus atomic.
+class LockedBus(I2CBus):
+    def __init__(self, backend):
+        self.backend = backend
+        self.bus_locks = dict()
+        self.handle_locks = dict()
+        self.lock = threading.Lock()
+
+    def bus_lock(self, bus):
+        with self.lock:
+            if bus not in self.bus_locks:
+                self.bus_locks[bus] = threading.Lock()
+            return self.bus_locks[bus]
+
+    def open(self, bus, addr, flags=0):
+        lock = self.bus_lock(bus)
+        with lock:
+            handle = self.backend.open(bus, addr, flags)
+        self.handle_locks[handle] = lock
+        return handle
+
+    def close(self, handle):
+        with self.handle_locks.pop(handle):
+            return self.backend.close(handle)
+
+    def read_byte(self, handle, reg):
+        with self.handle_locks[handle]:
+            return self.backend.read_byte(handle, reg)
+
+    def write_byte(self, handle, reg, value):
+        with self.handle_locks[handle]:
+            return self.backend.write_byte(handle, reg, value)
+
+    def read_block(self, handle, reg, count):
+        with self.handle_locks[handle]:
+            return self.backend.read_block(handle, reg, count)
+
+    def write_block(self, handle, reg, data):
+        with self.handle_locks[handle]:
+            return self.backend.write_block(handle, reg, data)
+
+    def gpio(self):
+        return self.backend.gpio()
+
+    def now(self, handle):
+        return self.backend.now(handle)
+
+    def stop(self):
+        self.backend.stop()
+
+
+# One pigpiod connection per host, shared by every sensor in the process.
+bus_pool = dict()
+bus_pool_lock = threading.Lock()
+
+
+def shared_bus(host=None, port=None):
+    key = (host, port)
+    with bus_pool_lock:
+        if key not in bus_pool:
+            bus_pool[key] = LockedBus(PigpioBus(host, port))
+        return bus_pool[key]
@@ -0,0 +1,191 @@
+########################################################################################################################
+# THIS IS AN UNPUBLISHED WORK CONTAINING Rohit Priyadarshi's CONFIDENTIAL AND PROPRIETARY INFORMATION, CREATED IN 2018
+#
+# I have worked very hard to create a quality product and wish to realize the fair fruits of my labor. I therefore
+# insist that you honor my copyright. This material is provided 'as is', with absolutely no warranty expressed or
+# implied. However, I want to encourage the use of my product in all possible circumstances and will work very hard to
+# meet your needs if you will contact me at rohit@rishkan.com and ask for permission.
+########################################################################################################################
+
+########################################################################################################################
+# Sensor daemon
+#
+# One process owns the sensor and its log file and publishes every sample into a shared memory Ring. Consumers (scope,
+# uploader, ...) attach to the ring by name and never touch I2C. A Unix socket takes one line commands and answers one
+# line of JSON:
+#   info            ring name, capacity, sensor address and id
+#   stats           scheduler statistics and current write_seq
+#   period <sec>    change the sampling period
+#   stop            stop the daemon
+#
+# Only one daemon may own a sensor. On start the socket is probed first: if a daemon answers, starting another is
+# refused with DaemonError; if nothing listens (a daemon that crashed), its ring segment and socket are cleaned up.
+# Consumers use probe() the same way to decide between following the ring and owning the sensor themselves.
+########################################################################################################################
+
+import json
+import math
+import os
+import socket
+import socketserver
+import threading
+import time
+from ADT7420 import *
+from ring import Ring
+
+DMN_CAPACITY = 4096
+DMN_MSG_START = 'Publishing'
+DMN_MSG_STOP = 'Stopped publishing'
+DMN_BUF_SIZE = 4096
+DMN_TIMEOUT = 2.0
+DMN_POLL = 0.05
+
+
+class DaemonError(Exception):
+    pass
+
+
+def ring_name(bus, addr):
+    return 'adt7420_{0}_{1:x}'.format(bus, addr)
+
+
+def sock_path(bus, addr):
+    return '/tmp/adt7420_{0}_{1:x}.sock'.format(bus, addr)
+
+
+class ControlHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            args = line.decode().split()
+            if not args:
+                continue
+            reply = self.server.daemon.command(args[0], args[1:])
+            self.wfile.write((json.dumps(reply) + '\n').encode())
+
+
+class ControlServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class SensorDaemon:
+    def __init__(self, sensor, capacity=DMN_CAPACITY, name=None, path=None):
+        self.sensor = sensor
+        name = name or ring_name(sensor.i2c_bus, sensor.i2c_addr)
+        self.path = path or sock_path(sensor.i2c_bus, sensor.i2c_addr)
+        self.stopped = threading.Event()
+        if probe(self.path) is not None:
+            raise DaemonError('A sensor daemon is already running on {0}'.format(self.path))
+        # A daemon that crashed leaves its ring segment and socket behind
+        Ring.remove(name)
+        self.ring = Ring.create(name, capacity)
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.server = ControlServer(self.path, ControlHandler)
+        self.server.daemon = self
+
+    def command(self, cmd, args):
+        s = self.sensor
+        if cmd == 'info':
+            return dict(ring=self.ring.name, capacity=self.ring.capacity, bus=s.i2c_bus, addr=s.i2c_addr,
+                        id=s.dev_id, period=s.sched.period)
+        if cmd == 'stats':
+            return dict(s.sched.stats(), write_seq=self.ring.write_seq())
+        if cmd == 'period' and args:
+            try:
+                period = float(args[0])
+            except ValueError:
+                period = None
+            # 0 or less would spin on the bus, inf would make the scheduler's sleep raise
+            if period is None or not math.isfinite(period) or period <= 0:
+                return dict(error='bad period: {0}'.format(args[0]))
+            s.sched.period = period
+            return dict(period=s.sched.period)
+        if cmd == 'stop':
+            self.stopped.set()
+            return dict(stopped=True)
+        return dict(error='unknown command: {0}'.format(cmd))
+
+    def publish(self):
+        s = self.sensor
+        s.read()
+        s.log_data()
+        self.ring.write(s.time, s.i2c_addr, s.i2c_data.code(), s.i2c_data.status, s.temp)
+
+    def run(self):
+        t = threading.Thread(target=self.server.serve_forever)
+        t.daemon = True
+        t.start()
+        if self.sensor.con:
+            print('{0}, {1}, {2}'.format(DMN_MSG_START, self.ring.name, self.path))
+
+        self.sensor.sched.start()
+        try:
+            while not self.stopped.is_set():
+                self.publish()
+                self.sensor.sched.wait()
+
+        except KeyboardInterrupt:
+            pass
+
+        finally:
+            self.close()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.ring.close()
+        if self.sensor.con:
+            print(DMN_MSG_STOP)
+
+
+def control(path, cmd, timeout=None):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(path)
+        sock.sendall((cmd + '\n').encode())
+        return json.loads(sock.makefile().readline())
+
+
+# The info reply of the daemon listening on path, or None when there is no socket or nothing listens on it any more
+def probe(path):
+    try:
+        return control(path, 'info', DMN_TIMEOUT)
+    except (FileNotFoundError, ConnectionRefusedError):
+        return None
+
+
+# Attach to a running daemon: ask it where its ring lives and map it.
+def connect(bus, addr):
+    info = control(sock_path(bus, addr), 'info')
+    return Ring.attach(info['ring']), info
+
+
+# Yields the records published from seq on (by default only new ones) as copies, polling the ring while it is idle
+def follow(ring, seq=None, poll=DMN_POLL):
+    seq = ring.write_seq() if seq is None else seq
+    while True:
+        recs, seq, _ = ring.read(seq)
+        if len(recs):
+            seq += len(recs)
+            yield recs.copy()
+        else:
+            time.sleep(poll)
+
+
+def mon_daemon():
+    info = probe(sock_path(1, 0x49))
+    if info is not None:
+        print('Sensor daemon already running, ring {0}'.format(info['ring']))
+        return
+    ts = ADT7420(1, 0x49, .240, '/home/pi/temp_mon.csv', False)
+    SensorDaemon(ts).run()
+
+
+def main():
+    mon_daemon()
+
+
+if __name__ == "__main__":
+    main()
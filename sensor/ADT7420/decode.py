@@ -0,0 +1,81 @@
+########################################################################################################################
+# THIS IS AN UNPUBLISHED WORK CONTAINING Rohit Priyadarshi's CONFIDENTIAL AND PROPRIETARY INFORMATION, CREATED IN 2018
+#
+# I have worked very hard to create a quality product and wish to realize the fair fruits of my labor. I therefore
+# insist that you honor my copyright. This material is provided 'as is', with absolutely no warranty expressed or
+# implied. However, I want to encourage the use of my product in all possible circumstances and will work very hard to
+# meet your needs if you will contact me at rohit@rishkan.com and ask for permission.
+########################################################################################################################
+
+########################################################################################################################
+# Vectorized temperature decoder
+#
+# Raw codes are the 16-bit (MSB << 8) | LSB register pair. In 16-bit mode the whole word is a twos complement value in
+# units of 1/128 deg C. In 13-bit mode the temperature is the top 13 bits, twos complement in units of 1/16 deg C, and
+# bits [2:0] are the T_LOW, T_HIGH and T_CRIT flags (Table 9).
+#
+# test_decode.py checks every code against the datasheet formulas and tables; run this file to time the decoder.
+########################################################################################################################
+
+import time
+import numpy as np
+
+DEC_RES_13 = 13
+DEC_RES_16 = 16
+
+DEC_FLAG_T_LOW = 0b001
+DEC_FLAG_T_HIGH = 0b010
+DEC_FLAG_T_CRIT = 0b100
+
+# Datasheet Table 4/5 examples, (temperature, raw register code)
+DEC_TABLE_13 = ((-40, 0x1D80 << 3), (-25, 0x1E70 << 3), (-0.0625, 0x1FFF << 3), (0, 0x0000), (0.0625, 0x0001 << 3),
+                (25, 0x0190 << 3), (105, 0x0690 << 3), (125, 0x07D0 << 3), (150, 0x0960 << 3))
+DEC_TABLE_16 = ((-40, 0xEC00), (-25, 0xF380), (-0.0078, 0xFFFF), (0, 0x0000), (0.0078, 0x0001), (25, 0x0C80),
+                (105, 0x3480), (125, 0x3E80), (150, 0x4B00))
+
+
+def decode_code(code, resolution=DEC_RES_16):
+    if code & 0x8000:
+        code -= 0x10000
+    if resolution == DEC_RES_13:
+        return (code >> 3) / 16.0
+    return code / 128.0
+
+
+def encode_code(celsius):
+    # Setpoint registers are always in 16-bit format (Table 12 - 17)
+    code = int(round(celsius * 128))
+    if not -0x8000 <= code <= 0x7FFF:
+        raise ValueError('Temperature out of range: {0}'.format(celsius))
+    return code & 0xFFFF
+
+
+def decode(codes, resolution=DEC_RES_16):
+    signed = np.asarray(codes, dtype=np.uint16).view(np.int16)
+    if resolution == DEC_RES_13:
+        celsius = (signed >> 3) * (1 / 16.0)
+    else:
+        celsius = signed * (1 / 128.0)
+    return celsius, celsius * 1.8 + 32
+
+
+def flags(codes):
+    return np.asarray(codes, dtype=np.uint16) & 0b111
+
+
+def bench(n=10000000):
+    codes = np.random.randint(0, 0x10000, n).astype(np.uint16)
+    for res in (DEC_RES_13, DEC_RES_16):
+        start = time.perf_counter()
+        decode(codes, res)
+        elapsed = time.perf_counter() - start
+        print('decode: {0}-bit, {1} codes in {2:.1f} ms, {3:.0f} Msamples/s'.format(res, n, elapsed * 1000,
+                                                                                  n / elapsed / 1e6))
+
+
+def main():
+    bench()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+########################################################################################################################
+# THIS IS AN UNPUBLISHED WORK CONTAINING Rohit Priyadarshi's CONFIDENTIAL AND PROPRIETARY INFORMATION, CREATED IN 2018
+#
+# I have worked very hard to create a quality product and wish to realize the fair fruits of my labor. I therefore
+# insist that you honor my copyright. This material is provided 'as is', with absolutely no warranty expressed or
+# implied. However, I want to encourage the use of my product in all possible circumstances and will work very hard to
+# meet your needs if you will contact me at rohit@rishkan.com and ask for permission.
+########################################################################################################################
+
+########################################################################################################################
+# Columnar export
+#
+# Streams CSV/binary logs and live ADT7420 samples into Parquet (pyarrow) or HDF5 (h5py) files holding the LOG_DTYPE
+# columns time, temp, code, addr and status. Input is consumed EXP_CHUNK records at a time and each chunk becomes one
+# Parquet row group or one HDF5 chunk, so memory stays bounded by a chunk whatever the size of the log.
+#
+# Every file carries the sensor metadata written by ADT7420.log_sensor_info and log_connection: sensor ID, bus,
+# address, resolution, vendor and revision. For a CSV log it is recovered from the connect and info lines; rotated
+# logs have none, so the first input that does supplies it for the whole export.
+#
+# read() loads only the columns asked for and only the chunks whose time range overlaps [t0, t1): Parquet through the
+# row group min/max statistics, HDF5 through the per write min/max time kept next to the columns.
+#
+#   Parquet:  one row group per chunk, schema metadata key EXP_META_KEY holds the metadata as JSON
+#   HDF5:     /samples/<column> chunked and gzipped datasets; /samples/row, t_min and t_max give the first row and
+#             time range of every write; metadata as attributes of /samples
+#
+#   python3 export.py <out.parquet or out.h5> <temp_mon.csv, .csv.gz or .bin> ...
+########################################################################################################################
+
+import gzip
+import json
+import os
+import sys
+import time
+import numpy as np
+from ADT7420 import SENS_MSG_BOOT, SENS_MSG_CONNECT, sens_vendor
+from decode import DEC_RES_16
+from samplelog import LOG_DTYPE, LOG_GZ_EXT, LOG_BIN_EXT, is_binary_log, read_csv_chunks
+
+EXP_CHUNK = 65536
+EXP_LIVE_CHUNK = 4096
+EXP_FLUSH_INTERVAL = 60.0
+EXP_META_KEY = b'adt7420'
+EXP_GROUP = 'samples'
+EXP_PARQUET_EXT = ('.parquet', '.pq')
+EXP_HDF5_EXT = ('.h5', '.hdf5')
+EXP_INFO_LINES = 64
+
+
+class ExportError(Exception):
+    pass
+
+
+def sensor_meta(sensor):
+    return dict(sensor_id=hex(sensor.dev_id), bus=sensor.i2c_bus, addr=sensor.i2c_addr,
+                resolution=sensor.regs.resolution, vendor=sens_vendor.get(sensor.dev_man_id),
+                revision=sensor.dev_rev_id)
+
+
+# Metadata from the connect and sensor info lines at the top of an ADT7420 CSV log. The driver always configures
+# 16-bit resolution, and the address is not in the CSV.
+def csv_meta(path):
+    meta = dict()
+    with (gzip.open(path, 'rt') if path.endswith(LOG_GZ_EXT) else open(path)) as f:
+        for _, line in zip(range(EXP_INFO_LINES), f):
+            fields = [x.strip() for x in line.split(',')]
+            if len(fields) == 3 and fields[1] == SENS_MSG_CONNECT:
+                meta['sensor_id'] = fields[2]
+            elif len(fields) == 5 and fields[2] == SENS_MSG_BOOT:
+                meta['vendor'] = fields[1]
+                meta['revision'] = int(fields[4])
+                meta['resolution'] = DEC_RES_16
+                return meta
+    return meta
+
+
+def log_chunks(path, chunk=EXP_CHUNK):
+    if is_binary_log(path):
+        with (gzip.open(path, 'rb') if path.endswith(LOG_GZ_EXT) else open(path, 'rb')) as f:
+            while True:
+                recs = np.frombuffer(f.read(chunk * LOG_DTYPE.itemsize), dtype=LOG_DTYPE)
+                if not len(recs):
+                    return
+                yield recs.copy()
+    else:
+        for recs in read_csv_chunks(path, chunk):
+            yield recs
+
+
+class ParquetWriter:
+    def __init__(self, path, meta):
+        import pyarrow
+        import pyarrow.parquet
+        self.pa = pyarrow
+        fields = [(name, pyarrow.from_numpy_dtype(LOG_DTYPE[name])) for name in LOG_DTYPE.names]
+        schema = pyarrow.schema(fields, metadata={EXP_META_KEY: json.dumps(meta).encode()})
+        self.writer = pyarrow.parquet.ParquetWriter(path, schema, compression='zstd')
+
+    def write(self, recs):
+        self.writer.write_table(self.pa.table(dict((name, recs[name]) for name in LOG_DTYPE.names)),
+                                row_group_size=len(recs))
+
+    def close(self):
+        self.writer.close()
+
+
+class Hdf5Writer:
+    def __init__(self, path, meta, chunk):
+        import h5py
+        self.f = h5py.File(path, 'w')
+        self.group = self.f.create_group(EXP_GROUP)
+        for key, value in meta.items():
+            if value is not None:
+                self.group.attrs[key] = value
+        self.columns = dict((name, self.group.create_dataset(name, (0,), dtype=LOG_DTYPE[name], maxshape=(None,),
+                                                             chunks=(chunk,), compression='gzip', shuffle=True))
+                            for name in LOG_DTYPE.names)
+        self.index = dict((name, self.group.create_dataset(name, (0,), dtype=dtype, maxshape=(None,)))
+                          for name, dtype in (('row', '<i8'), ('t_min', '<f8'), ('t_max', '<f8')))
+        self.rows = 0
+
+    # Each write is one block in the time index; the file is flushed so it stays readable if the process dies
+    def write(self, recs):
+        n = len(recs)
+        for name, ds in self.columns.items():
+            ds.resize((self.rows + n,))
+            ds[self.rows:] = recs[name]
+        k = len(self.index['row'])
+        for name, value in (('row', self.rows), ('t_min', recs['time'].min()), ('t_max', recs['time'].max())):
+            self.index[name].resize((k + 1,))
+            self.index[name][k] = value
+        self.rows += n
+        self.f.flush()
+
+    def close(self):
+        self.f.close()
+
+
+# Buffers records into `chunk` sized chunks, and with a flush_interval also writes whatever is buffered after that
+# many seconds. live_exporter() sets one up as an ADT7420 listener.
+class Exporter:
+    def __init__(self, path, meta, chunk=EXP_CHUNK, flush_interval=None):
+        self.path = path
+        self.meta = dict(meta)
+        self.buf = np.zeros(chunk, dtype=LOG_DTYPE)
+        self.count = 0
+        self.rows = 0
+        self.flush_interval = flush_interval
+        self.last_flush = time.monotonic()
+        if path.endswith(EXP_PARQUET_EXT):
+            self.writer = ParquetWriter(path, self.meta)
+        elif path.endswith(EXP_HDF5_EXT):
+            self.writer = Hdf5Writer(path, self.meta, chunk)
+        else:
+            raise ExportError('Unknown export format: {0}'.format(path))
+
+    def __call__(self, sensor):
+        self.add(sensor.time, sensor.i2c_addr, sensor.i2c_data.code(), sensor.i2c_data.status, sensor.temp)
+
+    def add(self, t, addr, code, status, temp):
+        self.buf[self.count] = (t, temp, code, addr, status)
+        self.count += 1
+        if self.count == len(self.buf) or (self.flush_interval is not None and
+                                           time.monotonic() - self.last_flush >= self.flush_interval):
+            self.flush()
+
+    def extend(self, recs):
+        while len(recs):
+            n = min(len(recs), len(self.buf) - self.count)
+            self.buf[self.count:self.count + n] = recs[:n]
+            self.count += n
+            recs = recs[n:]
+            if self.count == len(self.buf):
+                self.flush()
+
+    def flush(self):
+        self.last_flush = time.monotonic()
+        if self.count:
+            self.writer.write(self.buf[:self.count])
+            self.rows += self.count
+            self.count = 0
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+
+# Live export of an ADT7420: small chunks flushed at least every EXP_FLUSH_INTERVAL seconds. A Parquet file only gets
+# its footer on close(), which ADT7420.monitor() calls for its listeners on the way out; HDF5 is readable after every
+# flush.
+def live_exporter(path, sensor, chunk=EXP_LIVE_CHUNK, flush_interval=EXP_FLUSH_INTERVAL):
+    exp = Exporter(path, sensor_meta(sensor), chunk, flush_interval)
+    sensor.add_listener(exp)
+    return exp
+
+
+# The CSV written next to a binary log: '<path>.bin' -> '<path>', '<path>.bin.<stamp>[.gz]' -> '<path>.<stamp>[.gz]'
+def csv_sibling(path):
+    head, base = os.path.split(path)
+    i = base.rfind(LOG_BIN_EXT)
+    return os.path.join(head, base[:i] + base[i + len(LOG_BIN_EXT):])
+
+
+# Metadata from the first CSV log with info lines, plus the address from the first record of a binary log. A binary
+# log is written next to its CSV, so that CSV is checked for info lines too.
+def logs_meta(paths):
+    meta = dict()
+    for path in paths:
+        csv_path = path
+        if is_binary_log(path):
+            first = next(log_chunks(path, 1), None)
+            if first is not None and 'addr' not in meta:
+                meta['addr'] = int(first['addr'][0])
+            csv_path = csv_sibling(path)
+        if 'vendor' not in meta and os.path.exists(csv_path):
+            meta.update(csv_meta(csv_path))
+    return meta
+
+
+def export_logs(out, paths, meta=None, chunk=EXP_CHUNK):
+    exp = Exporter(out, logs_meta(paths) if meta is None else meta, chunk)
+    for path in paths:
+        for recs in log_chunks(path, chunk):
+            exp.extend(recs)
+    exp.close()
+    return exp.rows
+
+
+def read_meta(path):
+    if path.endswith(EXP_PARQUET_EXT):
+        import pyarrow.parquet
+        return json.loads(pyarrow.parquet.read_schema(path).metadata[EXP_META_KEY].decode())
+    import h5py
+    with h5py.File(path, 'r') as f:
+        return dict((k, v.item() if hasattr(v, 'item') else v) for k, v in f[EXP_GROUP].attrs.items())
+
+
+def read(path, columns=None, t0=None, t1=None):
+    columns = list(columns or LOG_DTYPE.names)
+    dtype = np.dtype([(name, LOG_DTYPE[name]) for name in columns])
+    if path.endswith(EXP_PARQUET_EXT):
+        import pyarrow.parquet
+        filters = [f for f in (('time', '>=', t0), ('time', '<', t1)) if f[2] is not None]
+        table = pyarrow.parquet.read_table(path, columns=columns, filters=filters or None)
+        recs = np.zeros(table.num_rows, dtype=dtype)
+        for name in columns:
+            recs[name] = table.column(name).to_numpy()
+        return recs
+
+    import h5py
+    with h5py.File(path, 'r') as f:
+        group = f[EXP_GROUP]
+        starts = np.append(group['row'][:], len(group['time']))
+        keep = np.ones(len(starts) - 1, dtype=bool)
+        if t0 is not None:
+            keep &= group['t_max'][:] >= t0
+        if t1 is not None:
+            keep &= group['t_min'][:] < t1
+        parts = []
+        for k in np.flatnonzero(keep):
+            rows = slice(starts[k], starts[k + 1])
+            times = group['time'][rows]
+            mask = np.ones(len(times), dtype=bool)
+            if t0 is not None:
+                mask &= times >= t0
+            if t1 is not None:
+                mask &= times < t1
+            recs = np.zeros(int(mask.sum()), dtype=dtype)
+            for name in columns:
+                recs[name] = (times if name == 'time' else group[name][rows])[mask]
+            parts.append(recs)
+    return np.concatenate(parts) if parts else np.zeros(0, dtype=dtype)
+
+
+def main():
+    out = sys.argv[1]
+    rows = export_logs(out, sys.argv[2:])
+    print('{0}: {1} samples, {2} bytes, {3}'.format(out, rows, os.path.getsize(out), read_meta(out)))
+
+
+if __name__ == "__main__":
+    main()
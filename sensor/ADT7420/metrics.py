@@ -0,0 +1,223 @@
+########################################################################################################################
+# THIS IS AN UNPUBLISHED WORK CONTAINING Rohit Priyadarshi's CONFIDENTIAL AND PROPRIETARY INFORMATION, CREATED IN 2018
+#
+# I have worked very hard to create a quality product and wish to realize the fair fruits of my labor. I therefore
+# insist that you honor my copyright. This material is provided 'as is', with absolutely no warranty expressed or
+# implied. However, I want to encourage the use of my product in all possible circumstances and will work very hard to
+# meet your needs if you will contact me at rohit@rishkan.com and ask for permission.
+########################################################################################################################
+
+########################################################################################################################
+# Live metrics
+#
+# Counters and histograms are plain integer/float fields updated by the one thread that owns them (the sensor loop or
+# the uploader worker), so the hot path takes no locks; the HTTP thread only reads them, and a scrape can at worst see
+# a histogram one observation behind its count. Gauges are callables evaluated at scrape time, so values the pipeline
+# already tracks (Scheduler.missed, Uploader.queue) cost nothing between scrapes.
+#
+#   metrics = Metrics()
+#   instrument_sensor(metrics, ts)
+#   instrument_uploader(metrics, up)
+#   metrics.serve()            # http://127.0.0.1:9420/metrics, Prometheus text format 0.0.4
+########################################################################################################################
+
+import bisect
+import http.server
+import threading
+import time
+from bus import I2CBus
+
+MET_PORT = 9420
+MET_PATH = '/metrics'
+MET_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+MET_I2C_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+MET_JITTER_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0)
+
+
+def label_str(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join('{0}="{1}"'.format(k, v) for k, v in sorted(labels.items())) + '}'
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, n=1):
+        self.value += n
+
+    def samples(self, name, labels):
+        yield name, labels, self.value
+
+
+# Value read from func at scrape time; kind='counter' for monotonic values the pipeline already counts
+class Gauge:
+    def __init__(self, func, kind='gauge'):
+        self.func = func
+        self.kind = kind
+
+    def samples(self, name, labels):
+        yield name, labels, self.func()
+
+
+class Histogram:
+    kind = 'histogram'
+
+    def __init__(self, buckets):
+        self.bounds = tuple(buckets)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, v):
+        self.counts[bisect.bisect_left(self.bounds, v)] += 1
+        self.sum += v
+        self.count += 1
+
+    def samples(self, name, labels):
+        seen = 0
+        for bound, n in zip(self.bounds + ('+Inf',), self.counts):
+            seen += n
+            yield name + '_bucket', dict(labels, le=bound), seen
+        yield name + '_sum', labels, self.sum
+        yield name + '_count', labels, self.count
+
+
+class Metrics:
+    def __init__(self):
+        self.families = dict()
+        self.lock = threading.Lock()
+        self.server = None
+
+    def add(self, name, help_text, metric, labels):
+        with self.lock:
+            family = self.families.setdefault(name, (help_text, metric.kind, []))
+            family[2].append((labels, metric))
+        return metric
+
+    def counter(self, name, help_text, **labels):
+        return self.add(name, help_text, Counter(), labels)
+
+    def gauge(self, name, help_text, func, **labels):
+        return self.add(name, help_text, Gauge(func), labels)
+
+    def counter_func(self, name, help_text, func, **labels):
+        return self.add(name, help_text, Gauge(func, 'counter'), labels)
+
+    def histogram(self, name, help_text, buckets, **labels):
+        return self.add(name, help_text, Histogram(buckets), labels)
+
+    def render(self):
+        lines = []
+        with self.lock:
+            families = list(self.families.items())
+        for name, (help_text, kind, children) in families:
+            lines.append('# HELP {0} {1}'.format(name, help_text))
+            lines.append('# TYPE {0} {1}'.format(name, kind))
+            for labels, metric in children:
+                for sample, sample_labels, value in metric.samples(name, labels):
+                    lines.append('{0}{1} {2}'.format(sample, label_str(sample_labels),
+                                                     'NaN' if value is None else value))
+        return '\n'.join(lines) + '\n'
+
+    def serve(self, host='127.0.0.1', port=MET_PORT):
+        metrics = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != MET_PATH:
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', MET_CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = http.server.ThreadingHTTPServer((host, port), Handler)
+        t = threading.Thread(target=self.server.serve_forever, name='metrics')
+        t.daemon = True
+        t.start()
+        return self.server
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+# Times every transaction of the wrapped backend and counts the ones that raise.
+class InstrumentedBus(I2CBus):
+    def __init__(self, backend, latency, errors):
+        self.backend = backend
+        self.latency = latency
+        self.errors = errors
+
+    def timed(self, func, *args):
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        except Exception:
+            self.errors.inc()
+            raise
+        finally:
+            self.latency.observe(time.perf_counter() - start)
+
+    def open(self, bus, addr, flags=0):
+        return self.backend.open(bus, addr, flags)
+
+    def close(self, handle):
+        return self.backend.close(handle)
+
+    def read_byte(self, handle, reg):
+        return self.timed(self.backend.read_byte, handle, reg)
+
+    def write_byte(self, handle, reg, value):
+        return self.timed(self.backend.write_byte, handle, reg, value)
+
+    def read_block(self, handle, reg, count):
+        return self.timed(self.backend.read_block, handle, reg, count)
+
+    def write_block(self, handle, reg, data):
+        return self.timed(self.backend.write_block, handle, reg, data)
+
+    def gpio(self):
+        return self.backend.gpio()
+
+    def now(self, handle):
+        return self.backend.now(handle)
+
+    def stop(self):
+        self.backend.stop()
+
+
+def instrument_sensor(metrics, sensor):
+    labels = dict(bus=sensor.i2c_bus, addr=hex(sensor.i2c_addr))
+    latency = metrics.histogram('adt7420_i2c_seconds', 'I2C transaction latency', MET_I2C_BUCKETS, **labels)
+    errors = metrics.counter('adt7420_i2c_errors_total', 'I2C transactions that raised', **labels)
+    sensor.dev_bus = InstrumentedBus(sensor.dev_bus, latency, errors)
+    sensor.regs.bus = sensor.dev_bus
+
+    sched = sensor.sched
+    sched.observer = metrics.histogram('adt7420_loop_jitter_seconds', 'Lateness of each sample against its deadline',
+                                       MET_JITTER_BUCKETS, **labels).observe
+    metrics.counter_func('adt7420_samples_total', 'Scheduled samples taken', lambda: sched.ticks, **labels)
+    metrics.counter_func('adt7420_missed_total', 'Sample deadlines skipped because the loop fell a period behind',
+                  lambda: sched.missed, **labels)
+    metrics.gauge('adt7420_temperature_fahrenheit', 'Last temperature read', lambda: sensor.temp, **labels)
+
+
+def instrument_uploader(metrics, uploader):
+    metrics.gauge('thingspeak_queue_depth', 'Samples waiting to be uploaded', uploader.queue.qsize)
+    metrics.gauge('thingspeak_spooled', 'Samples held in the offline spool', lambda: uploader.spooled)
+    metrics.counter_func('thingspeak_sent_total', 'Samples accepted by ThingSpeak', lambda: uploader.sent)
+    metrics.counter_func('thingspeak_retries_total', 'Spool replay attempts', lambda: uploader.retries)
+    metrics.counter_func('thingspeak_failures_total', 'Failed upload requests', lambda: uploader.failures)
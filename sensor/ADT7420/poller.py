@@ -0,0 +1,104 @@
+########################################################################################################################
+# THIS IS AN UNPUBLISHED WORK CONTAINING Rohit Priyadarshi's CONFIDENTIAL AND PROPRIETARY INFORMATION, CREATED IN 2018
+#
+# I have worked very hard to create a quality product and wish to realize the fair fruits of my labor. I therefore
+# insist that you honor my copyright. This material is provided 'as is', with absolutely no warranty expressed or
+# implied. However, I want to encourage the use of my product in all possible circumstances and will work very hard to
+# meet your needs if you will contact me at rohit@rishkan.com and ask for permission.
+########################################################################################################################
+
+########################################################################################################################
+# Multi-sensor poller
+#
+# Sensors are grouped by I2C bus and each bus gets one worker thread. A bus is the backend plus the bus number, so bus
+# 1 on two pigpiod hosts gets two workers. Transactions on a bus are naturally serialized by its worker while separate
+# buses run in parallel. Every sensor keeps its own Scheduler, so periods are independent; the worker always services
+# the sensor with the earliest deadline.
+########################################################################################################################
+
+import threading
+from ADT7420 import *
+from bus import shared_bus
+
+POLL_MSG_ERROR = 'Read Error'
+POLL_ADDRS = (0x48, 0x49, 0x4A, 0x4B)
+
+
+class Poller:
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.buses = dict()
+        self.threads = []
+        self.stopped = threading.Event()
+        self.errors = dict()
+
+    def add(self, sensor):
+        self.buses.setdefault((sensor.dev_bus, sensor.i2c_bus), []).append(sensor)
+        self.errors[sensor] = 0
+
+    def start(self):
+        self.stopped.clear()
+        for k, ((_, bus), sensors) in enumerate(self.buses.items()):
+            t = threading.Thread(target=self.run_bus, args=(sensors,), name='i2c-{0}-{1}'.format(bus, k))
+            t.daemon = True
+            t.start()
+            self.threads.append(t)
+
+    def stop(self):
+        self.stopped.set()
+        for t in self.threads:
+            t.join()
+        self.threads = []
+
+    def run_bus(self, sensors):
+        for s in sensors:
+            s.sched.start()
+
+        while not self.stopped.is_set():
+            s = min(sensors, key=lambda x: x.sched.deadline)
+            delay = s.sched.deadline - s.sched.clock()
+            if delay > 0 and self.stopped.wait(delay):
+                break
+
+            try:
+                s.read()
+                s.log_data()
+            except Exception as e:
+                self.errors[s] += 1
+                if s.con:
+                    print('{0}, {1}, {2}, {3}'.format(s.time_str, POLL_MSG_ERROR, hex(s.i2c_addr), e))
+            else:
+                if self.callback:
+                    self.callback(s)
+            s.sched.wait()
+
+    def monitor(self):
+        self.start()
+        try:
+            while any(t.is_alive() for t in self.threads):
+                self.stopped.wait(1)
+
+        except KeyboardInterrupt:
+            pass
+
+        self.stop()
+        for sensors in self.buses.values():
+            for s in sensors:
+                if s.con:
+                    print('{0}, {1}'.format(hex(s.i2c_addr), s.sched.report()))
+
+
+def mon_multi():
+    backend = shared_bus()
+    poller = Poller()
+    for addr in POLL_ADDRS:
+        poller.add(ADT7420(1, addr, 1, '/home/pi/temp_mon_{0:x}.csv'.format(addr), True, backend=backend))
+    poller.monitor()
+
+
+def main():
+    mon_multi()
+
+
+if __name__ == "__main__":
+    main()
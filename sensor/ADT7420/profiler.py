@@ -0,0 +1,88 @@
+########################################################################################################################
+# THIS IS AN UNPUBLISHED WORK CONTAINING Rohit Priyadarshi's CONFIDENTIAL AND PROPRIETARY INFORMATION, CREATED IN 2018
+#
+# I have worked very hard to create a quality product and wish to realize the fair fruits of my labor. I therefore
+# insist that you honor my copyright. This material is provided 'as is', with absolutely no warranty expressed or
+# implied. However, I want to encourage the use of my product in all possible circumstances and will work very hard to
+# meet your needs if you will contact me at rohit@rishkan.com and ask for permission.
+########################################################################################################################
+
+########################################################################################################################
+# Hot path profiler
+#
+# Cheap enough to leave on in a production monitor(): each stage boundary costs one perf_counter_ns() call and a few
+# integer updates. Latencies go into a log2 histogram per stage (bucket k holds [2^(k-1), 2^k) ns), so memory is fixed
+# and percentiles are exact to within a factor of two.
+#
+#   ts.profiler = Profiler()
+#   ts.monitor()               # prints the per-stage table and latency histograms on exit
+########################################################################################################################
+
+import time
+
+PRF_BUCKETS = 40
+PRF_BAR = 40
+PRF_MSG = 'Profile'
+
+
+class StageStats:
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.max = 0
+        self.hist = [0] * PRF_BUCKETS
+
+    def add(self, ns):
+        self.count += 1
+        self.total += ns
+        if ns > self.max:
+            self.max = ns
+        self.hist[min(ns.bit_length(), PRF_BUCKETS - 1)] += 1
+
+    def percentile(self, p):
+        target = self.count * p
+        seen = 0
+        for k, n in enumerate(self.hist):
+            seen += n
+            if n and seen >= target:
+                return 1 << k
+        return 0
+
+
+class Profiler:
+    def __init__(self):
+        self.clock = time.perf_counter_ns
+        self.stages = dict()
+
+    def mark(self, stage, start):
+        now = self.clock()
+        if stage not in self.stages:
+            self.stages[stage] = StageStats()
+        self.stages[stage].add(now - start)
+        return now
+
+    def reset(self):
+        self.stages = dict()
+
+    def report(self, histograms=True):
+        lines = ['{0}, {1:<12} {2:>10} {3:>10} {4:>10} {5:>10} {6:>10}'.format(
+            PRF_MSG, 'stage', 'count', 'mean us', 'p50 us', 'p99 us', 'max us')]
+        for stage, s in self.stages.items():
+            lines.append('{0}, {1:<12} {2:>10} {3:>10.1f} {4:>10.1f} {5:>10.1f} {6:>10.1f}'.format(
+                PRF_MSG, stage, s.count, s.total / max(s.count, 1) / 1000, s.percentile(0.5) / 1000,
+                s.percentile(0.99) / 1000, s.max / 1000))
+        if histograms:
+            for stage, s in self.stages.items():
+                lines.extend(self.histogram(stage, s))
+        return '\n'.join(lines)
+
+    # Non-empty log2 buckets of one stage, in us, with a bar scaled to the fullest bucket
+    def histogram(self, stage, s):
+        lines = ['{0}, {1} histogram'.format(PRF_MSG, stage)]
+        peak = max(s.hist) or 1
+        for k, n in enumerate(s.hist):
+            if n:
+                lo = (1 << (k - 1)) / 1000 if k else 0.0
+                lines.append('{0},   [{1:>10.3f}, {2:>10.3f}) us {3:>10} {4}'.format(
+                    PRF_MSG, lo, (1 << k) / 1000, n, '#' * max(1, n * PRF_BAR // peak)))
+        return lines
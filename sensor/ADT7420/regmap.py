@@ -0,0 +1,289 @@
+########################################################################################################################
+# THIS IS AN UNPUBLISHED WORK CONTAINING Rohit Priyadarshi's CONFIDENTIAL AND PROPRIETARY INFORMATION, CREATED IN 2018
+#
+# I have worked very hard to create a quality product and wish to realize the fair fruits of my labor. I therefore
+# insist that you honor my copyright. This material is provided 'as is', with absolutely no warranty expressed or
+# implied. However, I want to encourage the use of my product in all possible circumstances and will work very hard to
+# meet your needs if you will contact me at rohit@rishkan.com and ask for permission.
+########################################################################################################################
+
+########################################################################################################################
+# Register map
+#
+# The register and field layout is not typed in twice: it is parsed once at import from the datasheet tables in the
+# comment header of ADT7420.py (Table 6 for the register list, Tables 8 - 19 for the fields of each register), so the
+# tables stay the single source of truth. Field names are the table names in lower case with punctuation folded to '_'
+# (Fault queue -> fault_queue, INT/CT mode -> int_ct_mode, T_HIGH MSB -> t_high_msb).
+#
+# RegMap keeps a shadow of the writable registers 0x03 - 0x0A plus the ID register, loaded with one block read on
+# first use. Setting fields only touches the shadow; flush() writes the span of dirty registers in one block write,
+# and verify() reads the flushed span back when it is called, so a group of sensors can be flushed first and verified
+# afterwards instead of paying a write and a read-back round trip per field:
+#
+#   regs = RegMap(bus, handle)
+#   regs.resolution = 16
+#   regs.fault_queue = 2
+#   regs.t_high = 40.0
+#   regs.flush()              # one write_block(0x03, 8 bytes)
+#   ...
+#   regs.verify()             # one read_block, raises RegMapError on a mismatch
+#
+# The operation mode bits are volatile: a one shot conversion drops the device back into shutdown by itself, so the
+# shadow records shutdown once a one shot write is flushed and verify() does not compare those bits.
+########################################################################################################################
+
+import collections
+import os
+import re
+from decode import decode_code, encode_code, DEC_RES_13, DEC_RES_16
+
+REG_SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ADT7420.py')
+REG_ID = 0x0B
+REG_SKIP_FIELDS = ('n_a', 'unused')
+
+REG_OP_CONTINUOUS = 0b00
+REG_OP_ONE_SHOT = 0b01
+REG_OP_1SPS = 0b10
+REG_OP_SHUTDOWN = 0b11
+
+Register = collections.namedtuple('Register', ['addr', 'name', 'default', 'writable', 'fields'])
+Field = collections.namedtuple('Field', ['name', 'addr', 'lo', 'width', 'writable', 'default'])
+
+
+class RegMapError(Exception):
+    pass
+
+
+def field_name(text):
+    return re.sub('[^a-z0-9]+', '_', text.lower()).strip('_')
+
+
+def parse_value(text):
+    text = text.split()[0] if text.split() else ''
+    if text.lower().startswith('0x'):
+        return None if 'x' in text[2:].lower() else int(text, 16)
+    return int(text, 2) if text and set(text) <= set('01') else None
+
+
+def parse_tables(path=REG_SOURCE):
+    names = dict()
+    defaults = dict()
+    fields = collections.OrderedDict()
+    addr = None
+    rows = []
+
+    def close_table():
+        for bits, default, access, name in rows:
+            name = field_name(name)
+            if name in REG_SKIP_FIELDS:
+                continue
+            hi, lo = bits
+            if lo >= 8:
+                hi, lo = hi - 8, lo - 8
+            fields.setdefault(addr, []).append(Field(name, addr, lo, hi - lo + 1, '/' in access, default))
+        del rows[:]
+
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.rstrip('\n')
+            title = re.match(r'# Table \d+\. (.*)', line)
+            if title:
+                close_table()
+                m = re.search(r'\(Register Address (0x[0-9A-Fa-f]+)\)', title.group(1))
+                addr = int(m.group(1), 16) if m else None
+                continue
+            row = re.match(r'# (0x[0-9A-Fa-f]{2})\s*\|([^|]*)\|(.*)', line)
+            if row and addr is None:
+                names[int(row.group(1), 16)] = row.group(2).strip()
+                defaults[int(row.group(1), 16)] = parse_value(row.group(3))
+                continue
+            if addr is None or not line.startswith('#') or '|' not in line:
+                continue
+            cols = [c.strip() for c in line[1:].split('|')]
+            if len(cols) < 4 or cols[0] == 'Bit':
+                continue
+            bits = re.match(r'\[(\d+):(\d+)\]$|(\d+)$', cols[0])
+            if bits:
+                hi = int(bits.group(1) or bits.group(3))
+                lo = int(bits.group(2) or bits.group(3))
+                rows.append([(hi, lo), parse_value(cols[1]), cols[2], cols[3]])
+            elif not cols[0] and rows and cols[3]:
+                rows[-1][3] += ' ' + cols[3]
+        close_table()
+
+    regs = collections.OrderedDict()
+    for addr in sorted(names):
+        reg_fields = fields.get(addr, [])
+        default = defaults[addr]
+        if reg_fields and all(f.default is not None for f in reg_fields):
+            default = 0
+            for f in reg_fields:
+                default |= f.default << f.lo
+        regs[addr] = Register(addr, names[addr], default, any(f.writable for f in reg_fields), tuple(reg_fields))
+    return regs
+
+
+REGISTERS = parse_tables()
+REG_WRITABLE = [r.addr for r in REGISTERS.values() if r.writable]
+REG_FIRST = min(REG_WRITABLE)
+REG_LAST = max(REG_WRITABLE)
+FIELDS = dict((f.name, f) for addr in range(REG_FIRST, REG_ID + 1) for f in REGISTERS[addr].fields)
+REG_VOLATILE = dict({FIELDS['operation_mode'].addr: ((1 << FIELDS['operation_mode'].width) - 1)
+                     << FIELDS['operation_mode'].lo})
+
+
+# A field with a conversion between its raw bits and the value the caller deals in
+class TypedField:
+    def __init__(self, name, to_raw=int, from_raw=int):
+        self.name = name
+        self.to_raw = to_raw
+        self.from_raw = from_raw
+
+    def __get__(self, regs, owner):
+        if regs is None:
+            return self
+        return self.from_raw(regs.get(self.name))
+
+    def __set__(self, regs, value):
+        regs.set(self.name, self.to_raw(value))
+
+
+# A setpoint spread over an MSB/LSB register pair, in deg C
+class Setpoint:
+    def __init__(self, name):
+        self.msb = name + '_msb'
+        self.lsb = name + '_lsb'
+
+    def __get__(self, regs, owner):
+        if regs is None:
+            return self
+        return decode_code((regs.get(self.msb) << 8) | regs.get(self.lsb))
+
+    def __set__(self, regs, celsius):
+        code = encode_code(celsius)
+        regs.set(self.msb, code >> 8)
+        regs.set(self.lsb, code & 0xFF)
+
+
+def check_range(lo, hi, what):
+    def check(value):
+        if not lo <= value <= hi:
+            raise RegMapError('{0} must be {1} - {2}'.format(what, lo, hi))
+        return int(value)
+
+    return check
+
+
+class RegMap:
+    resolution = TypedField('resolution', lambda res: {DEC_RES_13: 0, DEC_RES_16: 1}[res],
+                            lambda bit: DEC_RES_16 if bit else DEC_RES_13)
+    op_mode = TypedField('operation_mode')
+    fault_queue = TypedField('fault_queue', lambda n: check_range(1, 4, 'Fault queue')(n) - 1, lambda bits: bits + 1)
+    ct_active_high = TypedField('ct_pin_polarity', int, bool)
+    int_active_high = TypedField('int_pin_polarity', int, bool)
+    comparator = TypedField('int_ct_mode', int, bool)
+    t_high = Setpoint('t_high')
+    t_low = Setpoint('t_low')
+    t_crit = Setpoint('t_crit')
+    t_hyst = TypedField('t_hyst', check_range(0, 15, 'T_HYST'))
+    revision_id = TypedField('revision_id')
+    manufacture_id = TypedField('manufacture_id')
+
+    def __init__(self, bus, handle):
+        self.bus = bus
+        self.handle = handle
+        self.shadow = None
+        self.dirty = set()
+        self.unverified = None
+
+    def load(self):
+        data = self.bus.read_block(self.handle, REG_FIRST, REG_ID - REG_FIRST + 1)
+        self.shadow = bytearray(data)
+        self.dirty.clear()
+
+    def __getitem__(self, addr):
+        if not REG_FIRST <= addr <= REG_ID:
+            raise RegMapError('Register {0} is not in the shadowed range {1} - {2}'.format(hex(addr), hex(REG_FIRST),
+                                                                                            hex(REG_ID)))
+        if self.shadow is None:
+            self.load()
+        return self.shadow[addr - REG_FIRST]
+
+    def __setitem__(self, addr, value):
+        if addr not in REG_WRITABLE:
+            raise RegMapError('Register {0} is not writable'.format(hex(addr)))
+        if self.shadow is None:
+            self.load()
+        self.shadow[addr - REG_FIRST] = value & 0xFF
+        self.dirty.add(addr)
+
+    def get(self, name):
+        f = FIELDS[name]
+        return (self[f.addr] >> f.lo) & ((1 << f.width) - 1)
+
+    def set(self, name, value):
+        f = FIELDS[name]
+        mask = ((1 << f.width) - 1) << f.lo
+        if not f.writable:
+            raise RegMapError('Field {0} is read only'.format(name))
+        if value << f.lo & ~mask:
+            raise RegMapError('Field {0} is {1} bits wide'.format(name, f.width))
+        self[f.addr] = (self[f.addr] & ~mask) | (value << f.lo)
+
+    # Stages the datasheet power-on values of every writable register
+    def defaults(self):
+        for addr in REG_WRITABLE:
+            self[addr] = REGISTERS[addr].default
+
+    def flush(self):
+        if not self.dirty:
+            return
+        lo, hi = min(self.dirty), max(self.dirty)
+        self.bus.write_block(self.handle, lo, self.shadow[lo - REG_FIRST:hi - REG_FIRST + 1])
+        self.dirty.clear()
+        if self.unverified:
+            lo, hi = min(lo, self.unverified[0]), max(hi, self.unverified[1])
+        self.unverified = (lo, hi)
+
+        op = FIELDS['operation_mode']
+        if lo <= op.addr <= hi and self.get(op.name) == REG_OP_ONE_SHOT:
+            self.shadow[op.addr - REG_FIRST] |= REG_OP_SHUTDOWN << op.lo
+
+    def verify(self):
+        if not self.unverified:
+            return
+        lo, hi = self.unverified
+        self.unverified = None
+        data = self.bus.read_block(self.handle, lo, hi - lo + 1)
+        for addr, value in enumerate(data, lo):
+            mask = ~REG_VOLATILE.get(addr, 0) & 0xFF
+            expect = self.shadow[addr - REG_FIRST]
+            if (value ^ expect) & mask:
+                raise RegMapError('Register {0} reads back {1}, wrote {2}'.format(hex(addr), hex(value), hex(expect)))
+
+    # Drops the shadow so the next access reloads it, e.g. after a software reset
+    def invalidate(self):
+        self.shadow = None
+        self.dirty.clear()
+        self.unverified = None
+
+
+# Flushes every map first and reads back afterwards, so the writes to all sensors go out back to back
+def configure(regmaps):
+    for regs in regmaps:
+        regs.flush()
+    for regs in regmaps:
+        regs.verify()
+
+
+def main():
+    for reg in REGISTERS.values():
+        default = '--' if reg.default is None else '{0:02X}'.format(reg.default)
+        print('0x{0:02X} {1:<44} {2} {3}'.format(reg.addr, reg.name, default, 'R/W' if reg.writable else 'R'))
+        for f in reg.fields:
+            bits = str(f.lo) if f.width == 1 else '[{0}:{1}]'.format(f.lo + f.width - 1, f.lo)
+            print('     {0:<8} {1:<20} {2}'.format(bits, f.name, 'R/W' if f.writable else 'R'))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+########################################################################################################################
+# THIS IS AN UNPUBLISHED WORK CONTAINING Rohit Priyadarshi's CONFIDENTIAL AND PROPRIETARY INFORMATION, CREATED IN 2018
+#
+# I have worked very hard to create a quality product and wish to realize the fair fruits of my labor. I therefore
+# insist that you honor my copyright. This material is provided 'as is', with absolutely no warranty expressed or
+# implied. However, I want to encourage the use of my product in all possible circumstances and will work very hard to
+# meet your needs if you will contact me at rohit@rishkan.com and ask for permission.
+########################################################################################################################
+
+########################################################################################################################
+# Replay backend
+#
+# ReplayBus serves a recorded log through the I2C backend interface, so an unmodified ADT7420 reads it back as if it
+# were the live sensor. Sources are the CSV written by ADT7420.log_data ('<time>, <deg F>' rows, other lines skipped)
+# or the binary records of SampleLog (LOG_DTYPE, filtered by the address being opened).
+#
+# speed=1.0 replays in real time relative to the first read, speed=N replays N times faster, and speed=None hands out
+# the next record on every temperature read, as fast as the caller asks. now() returns the recorded timestamp, so logs
+# written during a replay keep the original times. Reading past the end raises EOFError.
+########################################################################################################################
+
+import time
+import numpy as np
+from bus import I2CBus
+from samplelog import read_log
+
+RPL_ID = 0xCB
+RPL_REG_STATUS = 0x02
+RPL_REG_ID = 0x0B
+RPL_STATUS_READY = 0x00
+
+
+class ReplayStream:
+    def __init__(self, recs, speed, clock):
+        self.recs = recs
+        self.speed = speed
+        self.clock = clock
+        self.start = None
+        self.pos = -1
+
+    def advance(self):
+        if self.speed is None:
+            self.pos += 1
+        else:
+            if self.start is None:
+                self.start = self.clock()
+            t = self.recs['time'][0] + (self.clock() - self.start) * self.speed
+            pos = max(int(np.searchsorted(self.recs['time'], t, side='right')) - 1, 0)
+            self.pos = len(self.recs) if pos == self.pos == len(self.recs) - 1 else pos
+        if self.pos >= len(self.recs):
+            raise EOFError('Replay finished')
+        return int(self.recs['code'][self.pos])
+
+    def time(self):
+        return float(self.recs['time'][max(self.pos, 0)])
+
+
+class ReplayBus(I2CBus):
+    def __init__(self, path, speed=1.0, clock=time.monotonic):
+        self.recs = read_log(path)
+        self.speed = speed
+        self.clock = clock
+        self.streams = dict()
+        self.next_handle = 0
+
+    def open(self, bus, addr, flags=0):
+        recs = self.recs
+        if recs['addr'].any():
+            recs = recs[recs['addr'] == addr]
+        handle = self.next_handle
+        self.next_handle += 1
+        self.streams[handle] = ReplayStream(recs, self.speed, self.clock)
+        return handle
+
+    def close(self, handle):
+        del self.streams[handle]
+        return 0
+
+    def read_byte(self, handle, reg):
+        return self.read_block(handle, reg, 1)[0]
+
+    def write_byte(self, handle, reg, value):
+        return 0
+
+    def read_block(self, handle, reg, count):
+        regs = bytearray(0x10)
+        regs[RPL_REG_STATUS] = RPL_STATUS_READY
+        regs[RPL_REG_ID] = RPL_ID
+        if reg == 0 and count >= 2:
+            code = self.streams[handle].advance()
+            regs[0] = code >> 8
+            regs[1] = code & 0xFF
+        return regs[reg:reg + count]
+
+    def write_block(self, handle, reg, data):
+        return 0
+
+    def now(self, handle):
+        stream = self.streams.get(handle)
+        if stream is None or stream.pos < 0:
+            return time.time()
+        return stream.time()
@@ -0,0 +1,124 @@
+########################################################################################################################
+# THIS IS AN UNPUBLISHED WORK CONTAINING Rohit Priyadarshi's CONFIDENTIAL AND PROPRIETARY INFORMATION, CREATED IN 2018
+#
+# I have worked very hard to create a quality product and wish to realize the fair fruits of my labor. I therefore
+# insist that you honor my copyright. This material is provided 'as is', with absolutely no warranty expressed or
+# implied. However, I want to encourage the use of my product in all possible circumstances and will work very hard to
+# meet your needs if you will contact me at rohit@rishkan.com and ask for permission.
+########################################################################################################################
+
+########################################################################################################################
+# Shared memory sample ring
+#
+# Single writer, any number of readers, no locks. The segment is a small header followed by `capacity` LOG_DTYPE
+# records. The writer fills slot (seq % capacity) and only then bumps the published write_seq, so a reader that sees
+# write_seq == n may use every record below n. Readers keep their own position; records [s, s + k) handed out as a
+# view stay valid while intact(s) holds, i.e. until the writer laps them.
+#
+# Header layout (little endian):
+#   0   u4  magic
+#   4   u4  capacity
+#   8   u8  write_seq
+########################################################################################################################
+
+import sys
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+from samplelog import LOG_DTYPE
+
+RING_MAGIC = 0x41445437  # 'ADT7'
+RING_HDR_SIZE = 64
+RING_HDR_DTYPE = np.dtype([('magic', '<u4'), ('capacity', '<u4'), ('write_seq', '<u8')])
+
+
+class RingError(Exception):
+    pass
+
+
+class Ring:
+    def __init__(self, shm, owner):
+        self.shm = shm
+        self.owner = owner
+        self.hdr = np.ndarray(1, dtype=RING_HDR_DTYPE, buffer=shm.buf)[0]
+        if not owner and self.hdr['magic'] != RING_MAGIC:
+            raise RingError('Not a sample ring: {0}'.format(shm.name))
+        self.capacity = int(self.hdr['capacity'])
+        self.recs = np.ndarray(self.capacity, dtype=LOG_DTYPE, buffer=shm.buf, offset=RING_HDR_SIZE)
+
+    @classmethod
+    def create(cls, name, capacity):
+        shm = shared_memory.SharedMemory(name=name, create=True, size=RING_HDR_SIZE + capacity * LOG_DTYPE.itemsize)
+        hdr = np.ndarray(1, dtype=RING_HDR_DTYPE, buffer=shm.buf)[0]
+        hdr['capacity'] = capacity
+        hdr['write_seq'] = 0
+        hdr['magic'] = RING_MAGIC
+        return cls(shm, True)
+
+    # Before 3.13 every SharedMemory() registers the segment with this process's resource tracker, which unlinks it
+    # when the process exits; a consumer must not take the ring down with it, so it is left to the owner.
+    @classmethod
+    def attach(cls, name):
+        if sys.version_info >= (3, 13):
+            return cls(shared_memory.SharedMemory(name=name, track=False), False)
+        shm = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(shm._name, 'shared_memory')
+        return cls(shm, False)
+
+    # Removes a segment left behind by an owner that died without close()
+    @staticmethod
+    def remove(name):
+        try:
+            shared_memory.SharedMemory(name=name).unlink()
+        except FileNotFoundError:
+            pass
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def write_seq(self):
+        return int(self.hdr['write_seq'])
+
+    def write(self, t, addr, code, status, temp):
+        seq = int(self.hdr['write_seq'])
+        rec = self.recs[seq % self.capacity]
+        rec['time'] = t
+        rec['temp'] = temp
+        rec['code'] = code
+        rec['addr'] = addr
+        rec['status'] = status
+        self.hdr['write_seq'] = seq + 1
+
+    def intact(self, seq):
+        return self.write_seq() < seq + self.capacity
+
+    def read(self, seq, count=None):
+        # Returns (view, start, missed). The view never wraps, so a caller wanting everything loops until start +
+        # len(view) reaches write_seq. `missed` counts records overwritten before the reader got to them.
+        end = self.write_seq()
+        missed = 0
+        if end - seq > self.capacity - 1:
+            missed = end - (self.capacity - 1) - seq
+            seq += missed
+        n = end - seq
+        if count is not None:
+            n = min(n, count)
+        start = seq % self.capacity
+        n = min(n, self.capacity - start)
+        return self.recs[start:start + n], seq, missed
+
+    def latest(self, count):
+        end = self.write_seq()
+        count = min(count, end, self.capacity - 1)
+        idx = np.arange(end - count, end) % self.capacity
+        return self.recs[idx]
+
+    def close(self):
+        self.hdr = None
+        self.recs = None
+        self.shm.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,159 @@
+########################################################################################################################
+# THIS IS AN UNPUBLISHED WORK CONTAINING Rohit Priyadarshi's CONFIDENTIAL AND PROPRIETARY INFORMATION, CREATED IN 2018
+#
+# I have worked very hard to create a quality product and wish to realize the fair fruits of my labor. I therefore
+# insist that you honor my copyright. This material is provided 'as is', with absolutely no warranty expressed or
+# implied. However, I want to encourage the use of my product in all possible circumstances and will work very hard to
+# meet your needs if you will contact me at rohit@rishkan.com and ask for permission.
+########################################################################################################################
+
+########################################################################################################################
+# Streaming rollups
+#
+# Rollup keeps running min/max/mean/stddev (Welford) and an EWMA over every sample, plus tiered downsampled series at
+# 1 s, 1 min, 1 h and 1 day. Each tier is a fixed size ring of ROLLUP_DTYPE buckets. A sample only touches the open
+# 1 s bucket; when a bucket closes it is merged into the next tier's open bucket, so the cost per sample is O(1) and
+# memory is bounded by the tier capacities. Buckets are aligned to UTC epoch multiples of their width. save() and load()
+# carry the open bucket of every tier as well, so a restart resumes the current hour and day instead of dropping them.
+#
+# Attach to a sensor with sensor.add_listener(rollup) to feed it from every ADT7420.read().
+########################################################################################################################
+
+import math
+import os
+import numpy as np
+
+ROLLUP_DTYPE = np.dtype([('time', '<f8'), ('count', '<u4'), ('min', '<f4'), ('max', '<f4'), ('sum', '<f8'),
+                         ('sumsq', '<f8')])
+
+# (bucket width in seconds, buckets kept)
+ROLLUP_TIERS = ((1, 86400), (60, 7 * 1440), (3600, 366 * 24), (86400, 10 * 366))
+ROLLUP_EWMA_ALPHA = 0.05
+ROLLUP_MAX_POINTS = 4000
+
+
+class Tier:
+    def __init__(self, width, capacity):
+        self.width = width
+        self.capacity = capacity
+        self.recs = np.zeros(capacity, dtype=ROLLUP_DTYPE)
+        self.closed = 0
+        self.start = None
+        self.n = 0
+        self.lo = 0.0
+        self.hi = 0.0
+        self.s = 0.0
+        self.ss = 0.0
+
+    def add(self, t, n, lo, hi, s, ss):
+        bucket = t - t % self.width
+        done = None
+        if self.start is not None and bucket != self.start:
+            done = self.close()
+        if self.start is None:
+            self.start, self.n, self.lo, self.hi, self.s, self.ss = bucket, n, lo, hi, s, ss
+        else:
+            self.n += n
+            self.lo = min(self.lo, lo)
+            self.hi = max(self.hi, hi)
+            self.s += s
+            self.ss += ss
+        return done
+
+    def close(self):
+        done = (self.start, self.n, self.lo, self.hi, self.s, self.ss)
+        self.recs[self.closed % self.capacity] = done
+        self.closed += 1
+        self.start = None
+        return done
+
+    def series(self):
+        n = min(self.closed, self.capacity)
+        return self.recs[np.arange(self.closed - n, self.closed) % self.capacity]
+
+    # True while the tier still holds the bucket for time t, or has never dropped one
+    def reaches(self, t):
+        return self.closed <= self.capacity or self.recs[self.closed % self.capacity]['time'] <= t
+
+    def load(self, recs):
+        n = min(len(recs), self.capacity)
+        self.recs[:n] = recs[len(recs) - n:]
+        self.closed = n
+
+    # The open bucket as zero or one ROLLUP_DTYPE records, so save() keeps a partial hour or day without closing it
+    def open_bucket(self):
+        if self.start is None:
+            return np.zeros(0, dtype=ROLLUP_DTYPE)
+        return np.array([(self.start, self.n, self.lo, self.hi, self.s, self.ss)], dtype=ROLLUP_DTYPE)
+
+    def load_open(self, recs):
+        if len(recs):
+            self.start, self.n, self.lo, self.hi, self.s, self.ss = recs[0].tolist()
+
+
+class Rollup:
+    def __init__(self, tiers=ROLLUP_TIERS, alpha=ROLLUP_EWMA_ALPHA):
+        self.tiers = [Tier(width, capacity) for width, capacity in tiers]
+        self.alpha = alpha
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.ewma = None
+
+    def __call__(self, sensor):
+        self.add(sensor.time, sensor.temp)
+
+    def add(self, t, v):
+        self.count += 1
+        self.min = min(self.min, v)
+        self.max = max(self.max, v)
+        delta = v - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (v - self.mean)
+        self.ewma = v if self.ewma is None else self.ewma + self.alpha * (v - self.ewma)
+
+        bucket = (t, 1, v, v, v, v * v)
+        for tier in self.tiers:
+            bucket = tier.add(*bucket)
+            if bucket is None:
+                break
+
+    def stats(self):
+        std = math.sqrt(self.m2 / self.count) if self.count else 0.0
+        return dict(count=self.count, min=self.min, max=self.max, mean=self.mean, std=std, ewma=self.ewma)
+
+    def query(self, t0, t1, max_points=ROLLUP_MAX_POINTS):
+        # Finest tier that still reaches back to t0 and answers [t0, t1) in at most max_points buckets; returns
+        # (width, time, min, max, mean, std)
+        tier = self.tiers[-1]
+        for candidate in self.tiers:
+            if (t1 - t0) / candidate.width <= max_points and candidate.reaches(t0):
+                tier = candidate
+                break
+        recs = tier.series()
+        recs = recs[np.searchsorted(recs['time'], t0):np.searchsorted(recs['time'], t1)]
+        mean = recs['sum'] / recs['count']
+        std = np.sqrt(np.maximum(recs['sumsq'] / recs['count'] - mean * mean, 0))
+        return tier.width, recs['time'], recs['min'], recs['max'], mean, std
+
+    def save(self, path):
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:
+            data = dict()
+            for tier in self.tiers:
+                data['tier_{0}'.format(tier.width)] = tier.series()
+                data['open_{0}'.format(tier.width)] = tier.open_bucket()
+            np.savez(f, **data)
+        os.replace(tmp, path)
+
+    def load(self, path):
+        with np.load(path) as data:
+            for tier in self.tiers:
+                key = 'tier_{0}'.format(tier.width)
+                if key in data:
+                    tier.load(data[key])
+                key = 'open_{0}'.format(tier.width)
+                if key in data:
+                    tier.load_open(data[key])
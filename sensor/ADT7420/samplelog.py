@@ -0,0 +1,206 @@
+########################################################################################################################
+# THIS IS AN UNPUBLISHED WORK CONTAINING Rohit Priyadarshi's CONFIDENTIAL AND PROPRIETARY INFORMATION, CREATED IN 2018
+#
+# I have worked very hard to create a quality product and wish to realize the fair fruits of my labor. I therefore
+# insist that you honor my copyright. This material is provided 'as is', with absolutely no warranty expressed or
+# implied. However, I want to encourage the use of my product in all possible circumstances and will work very hard to
+# meet your needs if you will contact me at rohit@rishkan.com and ask for permission.
+########################################################################################################################
+
+########################################################################################################################
+# Buffered sample log
+#
+# Samples are copied into a preallocated record array and written out in batches, either when the batch fills or when
+# flush_interval seconds have passed since the last flush. The CSV keeps the '<time>, <temp>' rows written by
+# ADT7420.log_data; with binary=True the raw records are also appended to '<path>.bin' in LOG_DTYPE layout. Files are
+# opened for append, and rotated when they exceed max_bytes or the local date changes. Rotated files get a unique
+# '.<time>[-<n>]' suffix and are gzipped on a background thread, so compression never stalls the sampling loop.
+########################################################################################################################
+
+import gzip
+import os
+import shutil
+import threading
+import time
+import numpy as np
+from decode import encode_code
+
+LOG_TIME_FMT = '%Y-%m-%d %H:%M:%S'
+LOG_ROTATE_FMT = '%Y%m%d-%H%M%S'
+LOG_BIN_EXT = '.bin'
+LOG_GZ_EXT = '.gz'
+LOG_TMP_EXT = '.tmp'
+LOG_CSV_CHUNK = 65536
+
+LOG_DTYPE = np.dtype([('time', '<f8'), ('temp', '<f8'), ('code', '<u2'), ('addr', 'u1'), ('status', 'u1')])
+
+
+class SampleLog:
+    def __init__(self, path, batch=256, flush_interval=5.0, max_bytes=16 * 1024 * 1024, binary=False, compress=True):
+        self.path = path
+        self.bin_path = path + LOG_BIN_EXT
+        self.batch = batch
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.binary = binary
+        self.compress = compress
+        self.buf = np.zeros(batch, dtype=LOG_DTYPE)
+        self.count = 0
+        self.last_flush = time.monotonic()
+        self.sec = None
+        self.sec_str = None
+        self.csv = None
+        self.bin = None
+        self.day = None
+        self.compressors = []
+        self.open()
+
+    def open(self):
+        self.csv = open(self.path, 'a')
+        if self.binary:
+            self.bin = open(self.bin_path, 'ab')
+        self.day = time.localtime().tm_yday
+
+    def close(self):
+        self.flush()
+        self.csv.close()
+        if self.bin:
+            self.bin.close()
+        for t in self.compressors:
+            t.join()
+        self.compressors = []
+
+    def time_str(self, t):
+        sec = int(t)
+        if sec != self.sec:
+            self.sec = sec
+            self.sec_str = time.strftime(LOG_TIME_FMT, time.localtime(sec))
+        return self.sec_str
+
+    def write(self, text):
+        self.flush()
+        self.csv.write(text)
+        self.csv.flush()
+
+    def add(self, t, addr, code, status, temp):
+        rec = self.buf[self.count]
+        rec['time'] = t
+        rec['temp'] = temp
+        rec['code'] = code
+        rec['addr'] = addr
+        rec['status'] = status
+        self.count += 1
+        if self.count == self.batch or time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        self.last_flush = time.monotonic()
+        if not self.count:
+            return
+
+        recs = self.buf[:self.count]
+        self.csv.write(''.join(['{0}, {1}\n'.format(self.time_str(t), v)
+                                for t, v in zip(recs['time'].tolist(), recs['temp'].tolist())]))
+        self.csv.flush()
+        if self.bin:
+            recs.tofile(self.bin)
+            self.bin.flush()
+        self.count = 0
+        self.rotate_if_needed()
+
+    def rotate_if_needed(self):
+        if self.csv.tell() >= self.max_bytes or time.localtime().tm_yday != self.day:
+            self.rotate()
+
+    def rotate(self):
+        self.csv.close()
+        if self.bin:
+            self.bin.close()
+
+        paths = [p for p in ((self.path, self.bin_path) if self.binary else (self.path,)) if os.path.exists(p)]
+        suffix = self.rotate_suffix(paths)
+        for path in paths:
+            os.rename(path, path + suffix)
+        self.open()
+        if self.compress:
+            # gzip of a full log takes long enough to stall sampling; do it beside the loop
+            t = threading.Thread(target=self.compress_files, args=([p + suffix for p in paths],),
+                                 name='log-compress')
+            t.start()
+            self.compressors = [c for c in self.compressors if c.is_alive()] + [t]
+
+    # '.<time>', or '.<time>-<n>' when a rotation already used this second
+    @staticmethod
+    def rotate_suffix(paths):
+        base = '.' + time.strftime(LOG_ROTATE_FMT)
+        suffix = base
+        n = 0
+        while any(os.path.exists(p + suffix) or os.path.exists(p + suffix + LOG_GZ_EXT) for p in paths):
+            n += 1
+            suffix = '{0}-{1}'.format(base, n)
+        return suffix
+
+    @classmethod
+    def compress_files(cls, paths):
+        for path in paths:
+            cls.compress_file(path)
+
+    @staticmethod
+    def compress_file(path):
+        tmp = path + LOG_GZ_EXT + LOG_TMP_EXT
+        with open(path, 'rb') as src, gzip.open(tmp, 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+        os.replace(tmp, path + LOG_GZ_EXT)
+        os.remove(path)
+
+
+def read_binary(path):
+    if path.endswith(LOG_GZ_EXT):
+        with gzip.open(path, 'rb') as f:
+            return np.frombuffer(f.read(), dtype=LOG_DTYPE).copy()
+    return np.fromfile(path, dtype=LOG_DTYPE)
+
+
+# '<path>.bin' and its rotated '<path>.bin.<stamp>[.gz]' are binary logs, everything else is CSV
+def is_binary_log(path):
+    return path.endswith(LOG_BIN_EXT) or LOG_BIN_EXT + '.' in os.path.basename(path)
+
+
+def read_log(path):
+    return read_binary(path) if is_binary_log(path) else read_csv(path)
+
+
+def f2c(temp):
+    return (temp - 32) * 5 / 9
+
+
+# Samples from the '<time>, <deg F>' rows of an ADT7420 CSV log, `chunk` records at a time so a log of any size is
+# read in bounded memory; connection and sensor info lines are skipped. Rotated '.gz' logs are read as they are.
+def read_csv_chunks(path, chunk=LOG_CSV_CHUNK):
+    recs = np.zeros(chunk, dtype=LOG_DTYPE)
+    n = 0
+    last = None
+    with (gzip.open(path, 'rt') if path.endswith(LOG_GZ_EXT) else open(path)) as f:
+        for line in f:
+            fields = line.split(',')
+            if len(fields) != 2:
+                continue
+            try:
+                temp = float(fields[1])
+                if fields[0] != last:
+                    t = time.mktime(time.strptime(fields[0].strip(), LOG_TIME_FMT))
+                    last = fields[0]
+            except ValueError:
+                continue
+            recs[n] = (t, temp, encode_code(f2c(temp)), 0, 0)
+            n += 1
+            if n == chunk:
+                yield recs.copy()
+                n = 0
+    if n:
+        yield recs[:n].copy()
+
+
+def read_csv(path):
+    parts = list(read_csv_chunks(path))
+    return np.concatenate(parts) if parts else np.zeros(0, dtype=LOG_DTYPE)
@@ -0,0 +1,76 @@
+########################################################################################################################
+# THIS IS AN UNPUBLISHED WORK CONTAINING Rohit Priyadarshi's CONFIDENTIAL AND PROPRIETARY INFORMATION, CREATED IN 2018
+#
+# I have worked very hard to create a quality product and wish to realize the fair fruits of my labor. I therefore
+# insist that you honor my copyright. This material is provided 'as is', with absolutely no warranty expressed or
+# implied. However, I want to encourage the use of my product in all possible circumstances and will work very hard to
+# meet your needs if you will contact me at rohit@rishkan.com and ask for permission.
+########################################################################################################################
+
+########################################################################################################################
+# Periodic scheduler
+#
+# Deadlines are absolute on the monotonic clock: deadline(n) = start + n * period. Time spent reading, formatting and
+# writing a sample is absorbed into the wait instead of being added to the period, so the loop does not drift. When
+# the caller falls more than a full period behind, the missed slots are counted and skipped rather than replayed in a
+# burst.
+########################################################################################################################
+
+import math
+import time
+
+SCHED_MSG_STATS = 'Scheduler'
+
+
+class Scheduler:
+    def __init__(self, period, clock=time.monotonic, sleep=time.sleep):
+        self.period = period
+        self.clock = clock
+        self.sleep = sleep
+        self.deadline = None
+        self.ticks = 0
+        self.missed = 0
+        self.jitter_sum = 0.0
+        self.jitter_sq = 0.0
+        self.jitter_max = 0.0
+        self.observer = None
+
+    def start(self):
+        self.deadline = self.clock() + self.period
+
+    def wait(self):
+        if self.deadline is None:
+            self.start()
+
+        now = self.clock()
+        if self.period <= 0:
+            self.deadline = now
+        elif now < self.deadline:
+            self.sleep(self.deadline - now)
+        else:
+            skipped = int((now - self.deadline) // self.period)
+            if skipped:
+                self.missed += skipped
+                self.deadline += skipped * self.period
+
+        jitter = self.clock() - self.deadline
+        self.ticks += 1
+        self.jitter_sum += jitter
+        self.jitter_sq += jitter * jitter
+        self.jitter_max = max(self.jitter_max, jitter)
+        self.deadline += self.period
+        if self.observer:
+            self.observer(jitter)
+        return jitter
+
+    def stats(self):
+        n = max(self.ticks, 1)
+        mean = self.jitter_sum / n
+        std = math.sqrt(max(self.jitter_sq / n - mean * mean, 0.0))
+        return dict(ticks=self.ticks, missed=self.missed, jitter_mean=mean, jitter_std=std,
+                    jitter_max=self.jitter_max)
+
+    def report(self):
+        s = self.stats()
+        return '{0}, ticks {1}, missed {2}, jitter mean {3:.6f}s std {4:.6f}s max {5:.6f}s'.format(
+            SCHED_MSG_STATS, s['ticks'], s['missed'], s['jitter_mean'], s['jitter_std'], s['jitter_max'])
@@ -0,0 +1,212 @@
+########################################################################################################################
+# THIS IS AN UNPUBLISHED WORK CONTAINING Rohit Priyadarshi's CONFIDENTIAL AND PROPRIETARY INFORMATION, CREATED IN 2018
+#
+# I have worked very hard to create a quality product and wish to realize the fair fruits of my labor. I therefore
+# insist that you honor my copyright. This material is provided 'as is', with absolutely no warranty expressed or
+# implied. However, I want to encourage the use of my product in all possible circumstances and will work very hard to
+# meet your needs if you will contact me at rohit@rishkan.com and ask for permission.
+########################################################################################################################
+
+########################################################################################################################
+# Simulated ADT7420
+#
+# SimSensor models the register file (Table 6) and is evaluated lazily: conversions that fell due since the last bus
+# access are applied when the next access arrives, so an idle virtual sensor costs nothing and thousands of them can
+# share one process. The model covers
+#   - conversion timing per operation mode: continuous every 240 ms, 1 SPS with a 60 ms conversion, one shot 240 ms
+#     after the mode write followed by shutdown, and no conversions in shutdown
+#   - ^RDY going low on each conversion and back high when the temperature registers are read
+#   - 13-bit and 16-bit resolution, with the T_LOW/T_HIGH/T_CRIT flags in the LSB in 13-bit mode
+#   - status flags against the setpoint registers with T_HYST, cleared by a status read
+#   - software reset through a write to 0x0F
+#
+# SimBus plugs the sensors into the ADT7420 driver:  ADT7420(1, 0x49, .240, path, False, backend=SimBus())
+########################################################################################################################
+
+import math
+import random
+import time
+from bus import I2CBus
+from decode import decode_code, encode_code
+
+SIM_REG_TEMP_MSB = 0x00
+SIM_REG_TEMP_LSB = 0x01
+SIM_REG_STATUS = 0x02
+SIM_REG_CONFIG = 0x03
+SIM_REG_T_HIGH = 0x04
+SIM_REG_T_LOW = 0x06
+SIM_REG_T_CRIT = 0x08
+SIM_REG_T_HYST = 0x0A
+SIM_REG_RESET = 0x0F
+
+SIM_POWER_ON = bytes((0x00, 0x00, 0x80, 0x00, 0x20, 0x00, 0x05, 0x00, 0x49, 0x80, 0x05, 0xCB, 0x00, 0x00, 0x00, 0x00))
+
+SIM_CFG_RES_16 = 0b10000000
+SIM_CFG_OP_MASK = 0b01100000
+SIM_OP_CONTINUOUS = 0b00000000
+SIM_OP_ONE_SHOT = 0b00100000
+SIM_OP_1SPS = 0b01000000
+SIM_OP_SHUTDOWN = 0b01100000
+
+SIM_STATUS_RDY = 0b10000000
+SIM_STATUS_T_LOW = 0b00010000
+SIM_STATUS_T_HIGH = 0b00100000
+SIM_STATUS_T_CRIT = 0b01000000
+
+SIM_CONV_TIME = 0.240
+SIM_CONV_TIME_1SPS = 0.060
+SIM_PERIOD_1SPS = 1.0
+
+
+def default_profile(mean=25.0, swing=2.0, period=600.0, noise=0.01):
+    phase = random.uniform(0, 2 * math.pi)
+
+    def profile(t):
+        return mean + swing * math.sin(2 * math.pi * t / period + phase) + random.gauss(0, noise)
+
+    return profile
+
+
+class SimSensor:
+    def __init__(self, profile=None, clock=time.monotonic):
+        self.profile = profile or default_profile()
+        self.clock = clock
+        self.reset()
+
+    def reset(self):
+        self.regs = bytearray(SIM_POWER_ON)
+        self.t_mode = self.clock()
+        self.done = 0
+        self.conversions = 0
+        self.flags = 0
+
+    # Conversions complete at t_mode + first + k * period
+    def schedule(self):
+        op = self.regs[SIM_REG_CONFIG] & SIM_CFG_OP_MASK
+        if op == SIM_OP_CONTINUOUS:
+            return SIM_CONV_TIME, SIM_CONV_TIME
+        if op == SIM_OP_1SPS:
+            return SIM_CONV_TIME_1SPS, SIM_PERIOD_1SPS
+        if op == SIM_OP_ONE_SHOT:
+            return SIM_CONV_TIME, None
+        return None, None
+
+    def update(self):
+        first, period = self.schedule()
+        if first is None:
+            return
+        elapsed = self.clock() - self.t_mode - first
+        if elapsed < 0:
+            return
+        due = 1 if period is None else int(elapsed // period) + 1
+        if due > self.done:
+            self.done = due
+            self.convert(self.t_mode + first + (due - 1) * (period or 0))
+            if period is None:
+                self.regs[SIM_REG_CONFIG] |= SIM_OP_SHUTDOWN
+
+    def setpoint(self, reg):
+        return decode_code((self.regs[reg] << 8) | self.regs[reg + 1])
+
+    def convert(self, t):
+        celsius = self.profile(t)
+        code = encode_code(min(max(celsius, -256.0), 255.99))
+        hyst = self.regs[SIM_REG_T_HYST] & 0x0F
+
+        t_low = self.setpoint(SIM_REG_T_LOW)
+        t_high = self.setpoint(SIM_REG_T_HIGH)
+        t_crit = self.setpoint(SIM_REG_T_CRIT)
+        if celsius < t_low:
+            self.flags |= SIM_STATUS_T_LOW
+        elif celsius >= t_low + hyst:
+            self.flags &= ~SIM_STATUS_T_LOW
+        if celsius > t_high:
+            self.flags |= SIM_STATUS_T_HIGH
+        elif celsius <= t_high - hyst:
+            self.flags &= ~SIM_STATUS_T_HIGH
+        if celsius > t_crit:
+            self.flags |= SIM_STATUS_T_CRIT
+        elif celsius <= t_crit - hyst:
+            self.flags &= ~SIM_STATUS_T_CRIT
+
+        if not self.regs[SIM_REG_CONFIG] & SIM_CFG_RES_16:
+            code &= ~0b111
+            for bit, flag in enumerate((SIM_STATUS_T_LOW, SIM_STATUS_T_HIGH, SIM_STATUS_T_CRIT)):
+                if self.flags & flag:
+                    code |= 1 << bit
+        self.regs[SIM_REG_TEMP_MSB] = code >> 8
+        self.regs[SIM_REG_TEMP_LSB] = code & 0xFF
+        self.regs[SIM_REG_STATUS] = self.flags
+        self.conversions += 1
+
+    def read(self, reg, count=1):
+        self.update()
+        data = bytearray()
+        for r in range(reg, reg + count):
+            r &= 0x0F
+            data.append(self.regs[r])
+            if r in (SIM_REG_TEMP_MSB, SIM_REG_TEMP_LSB):
+                self.regs[SIM_REG_STATUS] |= SIM_STATUS_RDY
+            elif r == SIM_REG_STATUS:
+                self.regs[SIM_REG_STATUS] &= SIM_STATUS_RDY
+        return data
+
+    def write(self, reg, data):
+        self.update()
+        for r, value in enumerate(data, reg):
+            r &= 0x0F
+            if r == SIM_REG_RESET:
+                self.reset()
+            elif r == SIM_REG_CONFIG:
+                old = self.regs[r]
+                self.regs[r] = value
+                if (old ^ value) & SIM_CFG_OP_MASK or value & SIM_CFG_OP_MASK == SIM_OP_ONE_SHOT:
+                    self.t_mode = self.clock()
+                    self.done = 0
+                    self.regs[SIM_REG_STATUS] |= SIM_STATUS_RDY
+            elif SIM_REG_T_HIGH <= r <= SIM_REG_T_HYST:
+                self.regs[r] = value
+
+
+class SimBus(I2CBus):
+    def __init__(self, profile=None, clock=time.monotonic):
+        self.profile = profile
+        self.clock = clock
+        self.sensors = dict()
+        self.handles = dict()
+        self.next_handle = 0
+        self.transactions = 0
+
+    def sensor(self, bus, addr):
+        key = (bus, addr)
+        if key not in self.sensors:
+            self.sensors[key] = SimSensor(self.profile, self.clock)
+        return self.sensors[key]
+
+    def open(self, bus, addr, flags=0):
+        handle = self.next_handle
+        self.next_handle += 1
+        self.handles[handle] = self.sensor(bus, addr)
+        return handle
+
+    def close(self, handle):
+        del self.handles[handle]
+        return 0
+
+    def read_byte(self, handle, reg):
+        self.transactions += 1
+        return self.handles[handle].read(reg)[0]
+
+    def write_byte(self, handle, reg, value):
+        self.transactions += 1
+        self.handles[handle].write(reg, (value & 0xFF,))
+        return 0
+
+    def read_block(self, handle, reg, count):
+        self.transactions += 1
+        return self.handles[handle].read(reg, count)
+
+    def write_block(self, handle, reg, data):
+        self.transactions += 1
+        self.handles[handle].write(reg, data)
+        return 0
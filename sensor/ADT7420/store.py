@@ -0,0 +1,179 @@
+########################################################################################################################
+# THIS IS AN UNPUBLISHED WORK CONTAINING Rohit Priyadarshi's CONFIDENTIAL AND PROPRIETARY INFORMATION, CREATED IN 2018
+#
+# I have worked very hard to create a quality product and wish to realize the fair fruits of my labor. I therefore
+# insist that you honor my copyright. This material is provided 'as is', with absolutely no warranty expressed or
+# implied. However, I want to encourage the use of my product in all possible circumstances and will work very hard to
+# meet your needs if you will contact me at rohit@rishkan.com and ask for permission.
+########################################################################################################################
+
+########################################################################################################################
+# Time-indexed sample store
+#
+# A store is a directory of segment files, one per `partition` seconds of epoch time (default one day), named by the
+# partition start so a directory listing is already in time order:
+#   <start>.seg     STORE_DTYPE records (epoch time f8, raw ADC code u2), appended in time order
+#   <start>.idx     sparse index: the time of every STORE_INDEX_STRIDE'th record, as f8
+# A range query picks the overlapping segments, memory-maps them read-only, binary searches the small sparse index and
+# then one stride of records on each end, and returns NumPy arrays without parsing anything.
+#
+#   python3 store.py <store dir> <temp_mon.csv, .csv.gz or .bin> ...    imports existing logs
+########################################################################################################################
+
+import os
+import sys
+import numpy as np
+from decode import decode
+from samplelog import read_log
+
+STORE_DTYPE = np.dtype([('time', '<f8'), ('code', '<u2')])
+STORE_PARTITION = 86400
+STORE_INDEX_STRIDE = 1024
+STORE_SEG_EXT = '.seg'
+STORE_IDX_EXT = '.idx'
+
+
+class Segment:
+    def __init__(self, path):
+        self.path = path
+        self.idx_path = path[:-len(STORE_SEG_EXT)] + STORE_IDX_EXT
+        self.start = int(os.path.basename(path)[:-len(STORE_SEG_EXT)])
+
+    def records(self):
+        n = os.path.getsize(self.path) // STORE_DTYPE.itemsize
+        if not n:
+            return np.zeros(0, dtype=STORE_DTYPE)
+        return np.memmap(self.path, dtype=STORE_DTYPE, mode='r', shape=(n,))
+
+    def index(self):
+        if not os.path.exists(self.idx_path):
+            return np.zeros(0)
+        return np.fromfile(self.idx_path, dtype='<f8')
+
+    def search(self, recs, idx, t, side):
+        # The sparse index narrows the search to one stride of records
+        block = max(int(np.searchsorted(idx, t, side=side)) - 1, 0)
+        lo = block * STORE_INDEX_STRIDE
+        hi = min(lo + 2 * STORE_INDEX_STRIDE, len(recs))
+        return lo + int(np.searchsorted(recs['time'][lo:hi], t, side=side))
+
+    def range(self, t0, t1):
+        recs = self.records()
+        idx = self.index()
+        return recs[self.search(recs, idx, t0, 'left'):self.search(recs, idx, t1, 'left')]
+
+
+class Store:
+    def __init__(self, path, partition=STORE_PARTITION):
+        self.path = path
+        self.partition = partition
+        self.seg = None
+        self.idx = None
+        self.seg_start = None
+        self.seg_count = 0
+        self.last = None
+        self.dropped = 0
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        segs = self.segments()
+        if segs:
+            recs = segs[-1].records()
+            if len(recs):
+                self.last = float(recs['time'][-1])
+
+    def __call__(self, sensor):
+        self.append(sensor.time, sensor.i2c_data.code())
+
+    def segments(self):
+        names = sorted(n for n in os.listdir(self.path) if n.endswith(STORE_SEG_EXT))
+        return [Segment(os.path.join(self.path, n)) for n in names]
+
+    def seg_path(self, start, ext):
+        return os.path.join(self.path, '{0:012d}{1}'.format(start, ext))
+
+    def open_segment(self, start):
+        self.close()
+        path = self.seg_path(start, STORE_SEG_EXT)
+        self.seg_count = os.path.getsize(path) // STORE_DTYPE.itemsize if os.path.exists(path) else 0
+        self.seg = open(path, 'ab')
+        self.idx = open(self.seg_path(start, STORE_IDX_EXT), 'ab')
+        self.seg_start = start
+
+    def append(self, t, code):
+        self.extend(np.array([t]), np.array([code]))
+
+    def extend(self, times, codes):
+        times = np.asarray(times, dtype='<f8')
+        codes = np.asarray(codes, dtype='<u2')
+        # A backward step of the wall clock must not stop acquisition: samples older than the newest one already stored
+        # are dropped and counted instead
+        newest = np.maximum.accumulate(np.concatenate(([-np.inf if self.last is None else self.last], times)))[:-1]
+        keep = times >= newest
+        if not keep.all():
+            self.dropped += int((~keep).sum())
+            times, codes = times[keep], codes[keep]
+        if not len(times):
+            return
+
+        starts = (times // self.partition).astype(np.int64) * self.partition
+        bounds = np.flatnonzero(np.diff(starts)) + 1
+        for lo, hi in zip(np.concatenate(([0], bounds)), np.concatenate((bounds, [len(times)]))):
+            start = int(starts[lo])
+            if start != self.seg_start:
+                self.open_segment(start)
+            recs = np.zeros(hi - lo, dtype=STORE_DTYPE)
+            recs['time'] = times[lo:hi]
+            recs['code'] = codes[lo:hi]
+            first = -self.seg_count % STORE_INDEX_STRIDE
+            recs['time'][first::STORE_INDEX_STRIDE].tofile(self.idx)
+            recs.tofile(self.seg)
+            self.seg_count += hi - lo
+        self.last = float(times[-1])
+
+    def flush(self):
+        if self.seg:
+            self.seg.flush()
+            self.idx.flush()
+
+    def close(self):
+        if self.seg:
+            self.seg.close()
+            self.idx.close()
+        self.seg = None
+        self.idx = None
+        self.seg_start = None
+
+    def query(self, t0, t1):
+        self.flush()
+        first = t0 // self.partition * self.partition
+        parts = [seg.range(t0, t1) for seg in self.segments() if first <= seg.start < t1]
+        if not parts:
+            return np.zeros(0), np.zeros(0, dtype='<u2')
+        recs = np.concatenate(parts)
+        return recs['time'], recs['code']
+
+    def query_temp(self, t0, t1, resolution=16):
+        times, codes = self.query(t0, t1)
+        return times, decode(codes, resolution)[1]
+
+
+def import_log(store, path):
+    recs = read_log(path)
+    order = np.argsort(recs['time'], kind='stable')
+    dropped = store.dropped
+    store.extend(recs['time'][order], recs['code'][order])
+    store.flush()
+    return len(recs) - (store.dropped - dropped)
+
+
+def main():
+    store = Store(sys.argv[1])
+    for path in sys.argv[2:]:
+        print('{0}, {1} samples'.format(path, import_log(store, path)))
+    if store.dropped:
+        print('{0} samples older than the store were dropped; import logs oldest first'.format(store.dropped))
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
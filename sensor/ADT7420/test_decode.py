@@ -0,0 +1,76 @@
+########################################################################################################################
+# THIS IS AN UNPUBLISHED WORK CONTAINING Rohit Priyadarshi's CONFIDENTIAL AND PROPRIETARY INFORMATION, CREATED IN 2018
+#
+# I have worked very hard to create a quality product and wish to realize the fair fruits of my labor. I therefore
+# insist that you honor my copyright. This material is provided 'as is', with absolutely no warranty expressed or
+# implied. However, I want to encourage the use of my product in all possible circumstances and will work very hard to
+# meet your needs if you will contact me at rohit@rishkan.com and ask for permission.
+########################################################################################################################
+
+########################################################################################################################
+# Exhaustive decoder tests
+#
+# Every 16-bit code in both modes is checked against the datasheet conversion formulas, written out here rather than
+# taken from decode_code(), and against the Table 4/5 examples. In 13-bit mode every 13-bit ADC code is combined with
+# every value of the three flag bits, so the flags can never leak into the temperature.
+#
+#   python3 -m pytest test_decode.py
+########################################################################################################################
+
+import numpy as np
+from decode import decode, decode_code, encode_code, flags, DEC_RES_13, DEC_RES_16, DEC_TABLE_13, DEC_TABLE_16
+
+CODES = np.arange(0x10000, dtype=np.uint16)
+
+
+# Table 4: positive temperature = ADC code / 16, negative temperature = (ADC code - 8192) / 16, over the 13-bit code
+def formula_13(adc):
+    return adc / 16.0 if adc < 0x1000 else (adc - 0x2000) / 16.0
+
+
+# 16-bit format: positive temperature = ADC code / 128, negative temperature = (ADC code - 65536) / 128
+def formula_16(adc):
+    return adc / 128.0 if adc < 0x8000 else (adc - 0x10000) / 128.0
+
+
+def test_16_bit_formula():
+    celsius, _ = decode(CODES, DEC_RES_16)
+    assert np.array_equal(celsius, [formula_16(c) for c in range(0x10000)])
+
+
+def test_13_bit_formula_and_flags():
+    adc = np.repeat(np.arange(0x2000), 8)
+    flag = np.tile(np.arange(8), 0x2000)
+    codes = ((adc << 3) | flag).astype(np.uint16)
+    celsius, _ = decode(codes, DEC_RES_13)
+    assert np.array_equal(celsius, [formula_13(a) for a in adc])
+    assert np.array_equal(flags(codes), flag)
+
+
+def test_flags_do_not_change_temperature():
+    celsius, _ = decode(CODES, DEC_RES_13)
+    assert np.array_equal(celsius, decode(CODES & 0xFFF8, DEC_RES_13)[0])
+
+
+def test_fahrenheit():
+    for res in (DEC_RES_13, DEC_RES_16):
+        celsius, fahrenheit = decode(CODES, res)
+        assert np.allclose(fahrenheit, celsius * 9 / 5 + 32)
+
+
+def test_datasheet_tables():
+    for res, table, tol in ((DEC_RES_16, DEC_TABLE_16, 0.0001), (DEC_RES_13, DEC_TABLE_13, 0.0)):
+        celsius, _ = decode(CODES, res)
+        for temp, code in table:
+            assert abs(celsius[code] - temp) <= tol, (res, temp, hex(code))
+
+
+def test_scalar_matches_vector():
+    for res in (DEC_RES_13, DEC_RES_16):
+        celsius, _ = decode(CODES, res)
+        assert np.array_equal(celsius, [decode_code(c, res) for c in range(0x10000)])
+
+
+def test_encode_round_trip():
+    for code in range(0x10000):
+        assert encode_code(decode_code(code)) == code
@@ -1,25 +1,67 @@
-from time import sleep
-import urllib.request
 from ADT7420 import *
+from uploader import Uploader
+from metrics import Metrics, instrument_sensor, instrument_uploader
+import daemon
 
 myAPI = "3A8LZ0TLMX7W34EL"
+myChannel = None  # channel id that myAPI writes to; bulk updates need it, set it before running
+myInterval = 15  # seconds between uploaded samples
 
 
-def main():
+# Owns the sensor: reads it every 240 ms and puts one sample per myInterval
+def push_sensor(up, metrics):
     ts = ADT7420(1, 0x49, .240, '/home/pi/temp_mon.csv', False)
-    print('Starting thingspeak.com push...')
-    baseURL = 'https://api.thingspeak.com/update?api_key=%s' % myAPI
+    instrument_sensor(metrics, ts)
+    last = None
     while True:
+        # A failed transaction is counted by the metrics bus wrapper; skip this sample and keep going
         try:
             ts.read_once()
-            f = urllib.request.urlopen(baseURL + "&field1=%s" % ts.temp)
-            print(f.read())
-            f.close()
-            sleep(15)  # uploads ADT7420 sensor values every 15 seconds
-
-        except:
-            print('Shutting down thingspeak.com push.')
-            break
+        except Exception as e:
+            print('Sensor read failed, {0}'.format(e))
+            ts.sched.wait()
+            continue
+        # The sensor is read every 240 ms; only one sample per myInterval goes to ThingSpeak, as before
+        if last is None or ts.time - last >= myInterval:
+            up.put(ts.time, ts.temp)
+            last = ts.time
+
+
+# Follows a running sensor daemon's ring instead, leaving the bus and the log file to the daemon
+def push_ring(up, ring):
+    last = None
+    for recs in daemon.follow(ring):
+        for t, temp in zip(recs['time'].tolist(), recs['temp'].tolist()):
+            if last is None or t - last >= myInterval:
+                up.put(t, temp)
+                last = t
+
+
+def main():
+    up = Uploader(myAPI, myChannel, '/home/pi/thingspeak_spool.jsonl', console_msg=True)
+    metrics = Metrics()
+    instrument_uploader(metrics, up)
+    info = daemon.probe(daemon.sock_path(1, 0x49))
+    ring = None
+    if info is not None:
+        ring, _ = daemon.connect(1, 0x49)
+    metrics.serve()
+    print('Starting thingspeak.com push{0}...'.format(' from ring ' + info['ring'] if ring else ''))
+    up.start()
+    try:
+        if ring:
+            push_ring(up, ring)
+        else:
+            push_sensor(up, metrics)
+
+    except KeyboardInterrupt:
+        pass
+
+    print('Shutting down thingspeak.com push.')
+    up.stop()
+    metrics.stop()
+    if ring:
+        ring.close()
 
 
 # call main
@@ -0,0 +1,163 @@
+########################################################################################################################
+# THIS IS AN UNPUBLISHED WORK CONTAINING Rohit Priyadarshi's CONFIDENTIAL AND PROPRIETARY INFORMATION, CREATED IN 2018
+#
+# I have worked very hard to create a quality product and wish to realize the fair fruits of my labor. I therefore
+# insist that you honor my copyright. This material is provided 'as is', with absolutely no warranty expressed or
+# implied. However, I want to encourage the use of my product in all possible circumstances and will work very hard to
+# meet your needs if you will contact me at rohit@rishkan.com and ask for permission.
+########################################################################################################################
+
+########################################################################################################################
+# ThingSpeak bulk uploader
+#
+# put() only enqueues and never blocks; if the queue is full the sample goes straight to the spool file. A worker
+# thread drains the queue at most once every `interval` seconds (ThingSpeak's bulk update rate limit) and posts the
+# batch as one bulk_update.json request over a kept-alive connection. When a request fails, that chunk and the rest of
+# the batch are appended to the spool and retried with exponential backoff; chunks already accepted are not sent
+# again. The spool is replayed, oldest first, before any new samples are sent.
+#
+# https://www.mathworks.com/help/thingspeak/bulkwritejsondata.html
+########################################################################################################################
+
+import http.client
+import json
+import os
+import queue
+import threading
+import time
+
+UPL_HOST = 'api.thingspeak.com'
+UPL_PATH = '/channels/{0}/bulk_update.json'
+UPL_INTERVAL = 15
+UPL_MAX_UPDATES = 960
+UPL_QUEUE = 4096
+UPL_BACKOFF = 5
+UPL_BACKOFF_MAX = 600
+UPL_TIMEOUT = 10
+UPL_TIME_FMT = '%Y-%m-%d %H:%M:%S +0000'
+
+UPL_MSG_FAIL = 'Upload failed'
+
+
+class UploadError(IOError):
+    pass
+
+
+class Uploader:
+    def __init__(self, api_key, channel, spool_file, host=UPL_HOST, port=None, https=True, interval=UPL_INTERVAL,
+                 console_msg=False):
+        if not channel:
+            raise UploadError('A ThingSpeak channel id is required for bulk updates')
+        self.api_key = api_key
+        self.path = UPL_PATH.format(channel)
+        self.spool_file = spool_file
+        self.host = host
+        self.port = port
+        self.https = https
+        self.interval = interval
+        self.con = console_msg
+        self.queue = queue.Queue(UPL_QUEUE)
+        self.conn = None
+        self.backoff = 0
+        self.stopped = threading.Event()
+        self.spool_lock = threading.Lock()
+        self.thread = None
+        self.sent = 0
+        self.spooled = 0
+        self.retries = 0
+        self.failures = 0
+
+    # Producer side
+    def put(self, t, temp):
+        update = {'created_at': time.strftime(UPL_TIME_FMT, time.gmtime(t)), 'field1': temp}
+        try:
+            self.queue.put_nowait(update)
+        except queue.Full:
+            self.spool([update])
+
+    def start(self):
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self.run, name='uploader')
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        if self.thread:
+            self.thread.join()
+        self.spool(self.drain())
+        self.disconnect()
+
+    # Worker side
+    def run(self):
+        while not self.stopped.wait(self.interval + self.backoff):
+            if not self.replay():
+                continue
+            updates = self.drain()
+            if updates:
+                self.spool(self.send(updates))
+
+    def drain(self):
+        updates = []
+        while True:
+            try:
+                updates.append(self.queue.get_nowait())
+            except queue.Empty:
+                return updates
+
+    # Returns the updates not accepted: on a failure, the failed chunk and everything after it
+    def send(self, updates):
+        for i in range(0, len(updates), UPL_MAX_UPDATES):
+            try:
+                self.post(updates[i:i + UPL_MAX_UPDATES])
+            except (OSError, http.client.HTTPException) as e:
+                self.failures += 1
+                self.backoff = min(max(self.backoff * 2, UPL_BACKOFF), UPL_BACKOFF_MAX)
+                self.disconnect()
+                if self.con:
+                    print('{0}, {1}, retry in {2:.0f}s'.format(UPL_MSG_FAIL, e, self.interval + self.backoff))
+                return updates[i:]
+            self.sent += len(updates[i:i + UPL_MAX_UPDATES])
+
+        self.backoff = 0
+        return []
+
+    def post(self, updates):
+        if self.conn is None:
+            cls = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+            self.conn = cls(self.host, self.port, timeout=UPL_TIMEOUT)
+        body = json.dumps({'write_api_key': self.api_key, 'updates': updates})
+        self.conn.request('POST', self.path, body, {'Content-Type': 'application/json', 'Connection': 'keep-alive'})
+        resp = self.conn.getresponse()
+        resp.read()
+        if resp.status >= 300:
+            raise UploadError('HTTP {0} {1}'.format(resp.status, resp.reason))
+
+    def disconnect(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    # Offline spool, one JSON update per line
+    def spool(self, updates):
+        if not updates:
+            return
+        with self.spool_lock, open(self.spool_file, 'a') as f:
+            f.write(''.join(json.dumps(u) + '\n' for u in updates))
+        self.spooled += len(updates)
+
+    def replay(self):
+        with self.spool_lock:
+            if not os.path.exists(self.spool_file):
+                return True
+            with open(self.spool_file) as f:
+                updates = [json.loads(line) for line in f if line.strip()]
+            os.remove(self.spool_file)
+
+        if not updates:
+            return True
+        self.retries += 1
+        unsent = self.send(updates)
+        self.spooled -= len(updates)
+        self.spool(unsent)
+        return not unsent
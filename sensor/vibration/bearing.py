@@ -0,0 +1,115 @@
+########################################################################################################################
+# THIS IS AN UNPUBLISHED WORK CONTAINING Rohit Priyadarshi's CONFIDENTIAL AND PROPRIETARY INFORMATION, CREATED IN 2018
+#
+# I have worked very hard to create a quality product and wish to realize the fair fruits of my labor. I therefore
+# insist that you honor my copyright. This material is provided 'as is', with absolutely no warranty expressed or
+# implied. However, I want to encourage the use of my product in all possible circumstances and will work very hard to
+# meet your needs if you will contact me at rohit@rishkan.com and ask for permission.
+########################################################################################################################
+
+########################################################################################################################
+# Rolling element bearing kinematics and a synthetic fault signal
+#
+# With n rolling elements of diameter d on pitch diameter D, contact angle phi and shaft rate fr, a defect on one race
+# is struck at a fixed multiple of fr:
+#   BPFO = n / 2 * fr * (1 - d / D * cos(phi))          outer race (ball pass frequency, outer)
+#   BPFI = n / 2 * fr * (1 + d / D * cos(phi))          inner race (ball pass frequency, inner)
+#   FTF  = fr / 2 * (1 - d / D * cos(phi))              cage
+#   BSF  = D / (2 * d) * fr * (1 - (d / D * cos(phi))^2) ball spin
+#
+# FaultSignal produces accelerometer-like samples block by block. Every strike of a defect rings a structural
+# resonance (a decaying sine), the strikes jitter by a little slip as real bearings do, an inner race defect rotates
+# through the load zone so its strikes are amplitude modulated at fr, and shaft imbalance plus white noise sit on top.
+# The ringing tail is carried from one block to the next, so any block size gives the same continuous signal.
+########################################################################################################################
+
+import collections
+import math
+import numpy as np
+
+# SKF 6205, the drive end bearing of the usual bearing fault test rigs
+BRG_BALLS = 9
+BRG_BALL_DIA = 7.94
+BRG_PITCH_DIA = 39.04
+BRG_CONTACT_ANGLE = 0.0
+
+BRG_NORMAL = 'normal'
+BRG_INNER = 'inner'
+BRG_OUTER = 'outer'
+
+BRG_RESONANCE = 3000.0
+BRG_DAMPING = 0.05
+BRG_SLIP = 0.01
+BRG_IMPULSE = 1.0
+BRG_SHAFT_AMP = 0.2
+BRG_NOISE = 0.1
+BRG_LOAD_DEPTH = 0.8
+
+
+class BearingError(Exception):
+    pass
+
+
+Bearing = collections.namedtuple('Bearing', ['balls', 'ball_dia', 'pitch_dia', 'contact_angle'])
+
+BRG_6205 = Bearing(BRG_BALLS, BRG_BALL_DIA, BRG_PITCH_DIA, BRG_CONTACT_ANGLE)
+
+
+def fault_freqs(shaft_hz, bearing=BRG_6205):
+    r = bearing.ball_dia / bearing.pitch_dia * math.cos(math.radians(bearing.contact_angle))
+    return dict(bpfo=bearing.balls / 2 * shaft_hz * (1 - r), bpfi=bearing.balls / 2 * shaft_hz * (1 + r),
+                ftf=shaft_hz / 2 * (1 - r), bsf=bearing.pitch_dia / (2 * bearing.ball_dia) * shaft_hz * (1 - r * r))
+
+
+class FaultSignal:
+    def __init__(self, fs, shaft_hz, fault=BRG_NORMAL, bearing=BRG_6205, resonance=BRG_RESONANCE,
+                 damping=BRG_DAMPING, impulse=BRG_IMPULSE, slip=BRG_SLIP, shaft_amp=BRG_SHAFT_AMP, noise=BRG_NOISE,
+                 seed=None):
+        if resonance >= fs / 2:
+            raise BearingError('Resonance {0:.0f} Hz is above Nyquist for fs {1:.0f} Hz'.format(resonance, fs))
+        self.fs = fs
+        self.shaft_hz = shaft_hz
+        self.fault = fault
+        self.impulse = impulse
+        self.slip = slip
+        self.shaft_amp = shaft_amp
+        self.noise = noise
+        seeds = np.random.SeedSequence(seed).spawn(2)
+        self.noise_rng = np.random.default_rng(seeds[0])
+        self.slip_rng = np.random.default_rng(seeds[1])
+        freqs = fault_freqs(shaft_hz, bearing)
+        self.strike_hz = dict({BRG_INNER: freqs['bpfi'], BRG_OUTER: freqs['bpfo']}).get(fault)
+
+        # Impulse response of the resonance, cut off once it has decayed to 0.1 %
+        decay = damping * 2 * math.pi * resonance
+        t = np.arange(int(math.ceil(math.log(1000) / decay * fs))) / fs
+        self.ring = np.exp(-decay * t) * np.sin(2 * math.pi * resonance * t)
+        self.tail = np.zeros(len(self.ring) - 1)
+        self.n = 0
+        self.next_strike = 0.0
+
+    def strikes(self, t0, t1):
+        times = []
+        while self.next_strike < t1:
+            times.append(self.next_strike)
+            self.next_strike += (1 + self.slip_rng.normal(0, self.slip)) / self.strike_hz
+        return np.array(times) - t0
+
+    def block(self, n):
+        t = (self.n + np.arange(n)) / self.fs
+        x = self.shaft_amp * np.sin(2 * math.pi * self.shaft_hz * t) + self.noise_rng.normal(0, self.noise, n)
+
+        if self.strike_hz:
+            at = self.strikes(t[0], t[0] + n / self.fs)
+            amp = np.full(len(at), self.impulse)
+            if self.fault == BRG_INNER:
+                amp *= 1 - BRG_LOAD_DEPTH / 2 * (1 - np.cos(2 * math.pi * self.shaft_hz * (at + t[0])))
+            train = np.zeros(n)
+            np.add.at(train, np.minimum((at * self.fs).astype(np.int64), n - 1), amp)
+            rung = np.convolve(train, self.ring)
+            rung[:len(self.tail)] += self.tail
+            x += rung[:n]
+            self.tail = rung[n:]
+
+        self.n += n
+        return x
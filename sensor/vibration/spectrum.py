@@ -0,0 +1,189 @@
+########################################################################################################################
+# THIS IS AN UNPUBLISHED WORK CONTAINING Rohit Priyadarshi's CONFIDENTIAL AND PROPRIETARY INFORMATION, CREATED IN 2018
+#
+# I have worked very hard to create a quality product and wish to realize the fair fruits of my labor. I therefore
+# insist that you honor my copyright. This material is provided 'as is', with absolutely no warranty expressed or
+# implied. However, I want to encourage the use of my product in all possible circumstances and will work very hard to
+# meet your needs if you will contact me at rohit@rishkan.com and ask for permission.
+########################################################################################################################
+
+########################################################################################################################
+# Streaming envelope spectrum for bearing fault detection
+#
+# A race defect does not show up at its own frequency in the raw spectrum; it shows up as a train of short bursts of
+# the structure's resonance, repeated at BPFO or BPFI. The envelope spectrum recovers that repetition rate:
+#   1. frames of VIB_NFFT samples, overlapped by VIB_OVERLAP, Hann windowed, FFT
+#   2. keep only the resonance band, double it and inverse FFT: the analytic signal of the band passed frame
+#   3. its magnitude is the envelope; remove the mean, window again and FFT: the envelope spectrum
+#   4. score BPFO and BPFI as the envelope spectrum peak near each of their first VIB_HARMONICS harmonics, over the
+#      median of the envelope spectrum around them (its noise floor)
+# A frame is 'outer' or 'inner' when the larger score passes VIB_DETECT, otherwise 'normal'. The band has to lie below
+# fs / 2: below 10 kHz the default VIB_BAND does not, so pass a lower band (e.g. 600 - 1500 Hz at 3.2 kHz) or Spectrum
+# raises SpectrumError.
+#
+# Spectrum.feed() takes blocks of any size. Samples go into one preallocated buffer, every complete frame in it is
+# processed in a single batch (a strided view, one rfft/ifft/rfft over the whole stack), and the unconsumed remainder
+# is moved to the front, so memory is bounded by the frame size plus one block and the per call Python overhead is
+# paid per block rather than per frame.
+#
+# There is no accelerometer driver in this tree yet; anything that yields blocks of samples can feed the pipeline:
+# FaultSignal from bearing.py, or raw_blocks() over a file of little endian samples recorded elsewhere.
+#
+#   python3 spectrum.py [fs] [shaft Hz]        classifies synthetic normal/inner/outer signals and reports throughput
+########################################################################################################################
+
+import collections
+import sys
+import time
+import numpy as np
+from numpy.lib.stride_tricks import as_strided
+from bearing import FaultSignal, fault_freqs, BRG_6205, BRG_NORMAL, BRG_INNER, BRG_OUTER
+
+VIB_FS = 20000
+VIB_SHAFT_HZ = 29.95
+VIB_NFFT = 8192
+VIB_OVERLAP = 0.5
+VIB_BAND = (2000.0, 5000.0)
+VIB_HARMONICS = 3
+VIB_TOLERANCE = 0.02  # fault frequencies move with slip and speed error
+VIB_DETECT = 4.0
+VIB_BLOCK = 1024
+VIB_BENCH_TIME = 10.0
+
+
+class SpectrumError(Exception):
+    pass
+
+
+Features = collections.namedtuple('Features', ['time', 'rms', 'kurtosis', 'bpfo', 'bpfi', 'label'])
+
+
+class Spectrum:
+    def __init__(self, fs, shaft_hz, bearing=BRG_6205, nfft=VIB_NFFT, overlap=VIB_OVERLAP, band=VIB_BAND,
+                 harmonics=VIB_HARMONICS, detect=VIB_DETECT, callback=None):
+        self.fs = fs
+        self.nfft = nfft
+        self.hop = max(int(nfft * (1 - overlap)), 1)
+        self.detect = detect
+        self.callback = callback
+        self.window = np.hanning(nfft)
+        self.buf = np.zeros(2 * nfft)
+        self.count = 0
+        self.consumed = 0
+
+        # The resonance band has to sit below Nyquist, or the envelope is empty and every frame scores 0
+        if band[1] > fs / 2:
+            raise SpectrumError('Band {0[0]:.0f} - {0[1]:.0f} Hz is above Nyquist for fs {1:.0f} Hz'.format(band, fs))
+        bins = np.fft.rfftfreq(nfft, 1.0 / fs)
+        self.band = np.flatnonzero((bins >= band[0]) & (bins <= band[1]))
+        if not len(self.band):
+            raise SpectrumError('Band {0[0]:.0f} - {0[1]:.0f} Hz holds no FFT bins'.format(band))
+        self.analytic = np.zeros((0, nfft), dtype=complex)
+
+        # Envelope spectrum bins searched for each fault frequency: VIB_TOLERANCE either side of every harmonic
+        freqs = fault_freqs(shaft_hz, bearing)
+        self.fault_bins = dict()
+        for name in ('bpfo', 'bpfi'):
+            idx = [np.flatnonzero(np.abs(bins - h * freqs[name]) <= h * freqs[name] * VIB_TOLERANCE + fs / nfft)
+                   for h in range(1, harmonics + 1)]
+            self.fault_bins[name] = idx
+        # Noise floor from the envelope spectrum below twice the highest harmonic searched; the envelope is band
+        # limited, so the bins above that are near zero and would drag the median down
+        self.floor_bins = slice(1, 2 * max(i[-1] for idx in self.fault_bins.values() for i in idx) + 1)
+
+    def feed(self, block):
+        block = np.asarray(block, dtype=float)
+        if self.count + len(block) > len(self.buf):
+            buf = np.zeros(max(2 * self.nfft, self.count + len(block)))
+            buf[:self.count] = self.buf[:self.count]
+            self.buf = buf
+        self.buf[self.count:self.count + len(block)] = block
+        self.count += len(block)
+
+        frames = (self.count - self.nfft) // self.hop + 1 if self.count >= self.nfft else 0
+        if not frames:
+            return []
+        stride = self.buf.strides[0]
+        stack = as_strided(self.buf, shape=(frames, self.nfft), strides=(self.hop * stride, stride), writeable=False)
+        times = (self.consumed + np.arange(frames) * self.hop + self.nfft) / self.fs
+        features = self.analyze(stack, times)
+
+        used = frames * self.hop
+        self.buf[:self.count - used] = self.buf[used:self.count]
+        self.count -= used
+        self.consumed += used
+        if self.callback:
+            for f in features:
+                self.callback(f)
+        return features
+
+    def envelope_spectrum(self, stack):
+        spec = np.fft.rfft(stack * self.window, axis=1)
+        if self.analytic.shape[0] != len(stack):
+            self.analytic = np.zeros((len(stack), self.nfft), dtype=complex)
+        self.analytic[:, self.band] = 2 * spec[:, self.band]
+        env = np.abs(np.fft.ifft(self.analytic, axis=1))
+        env -= env.mean(axis=1, keepdims=True)
+        return np.abs(np.fft.rfft(env * self.window, axis=1))
+
+    def analyze(self, stack, times):
+        es = self.envelope_spectrum(stack)
+        floor = np.median(es[:, self.floor_bins], axis=1) + 1e-12
+        scores = dict()
+        for name, idx in self.fault_bins.items():
+            scores[name] = np.mean([es[:, i].max(axis=1) for i in idx], axis=0) / floor
+
+        centered = stack - stack.mean(axis=1, keepdims=True)
+        var = (centered ** 2).mean(axis=1)
+        rms = np.sqrt(var)
+        kurtosis = (centered ** 4).mean(axis=1) / (var ** 2 + 1e-24)
+
+        features = []
+        for k in range(len(stack)):
+            bpfo, bpfi = float(scores['bpfo'][k]), float(scores['bpfi'][k])
+            label = BRG_NORMAL
+            if max(bpfo, bpfi) >= self.detect:
+                label = BRG_OUTER if bpfo >= bpfi else BRG_INNER
+            features.append(Features(float(times[k]), float(rms[k]), float(kurtosis[k]), bpfo, bpfi, label))
+        return features
+
+
+def raw_blocks(path, dtype='<i2', block=VIB_BLOCK):
+    with open(path, 'rb') as f:
+        while True:
+            data = np.fromfile(f, dtype=dtype, count=block)
+            if not len(data):
+                return
+            yield data
+
+
+def ingest(blocks, spectrum):
+    features = []
+    for block in blocks:
+        features.extend(spectrum.feed(block))
+    return features
+
+
+def main():
+    fs = float(sys.argv[1]) if len(sys.argv) > 1 else VIB_FS
+    shaft_hz = float(sys.argv[2]) if len(sys.argv) > 2 else VIB_SHAFT_HZ
+    freqs = fault_freqs(shaft_hz)
+    print('fs {0:.0f} Hz, shaft {1:.2f} Hz, BPFO {2:.1f} Hz, BPFI {3:.1f} Hz'.format(fs, shaft_hz, freqs['bpfo'],
+                                                                                   freqs['bpfi']))
+    for fault in (BRG_NORMAL, BRG_INNER, BRG_OUTER):
+        spec = Spectrum(fs, shaft_hz)
+        sig = FaultSignal(fs, shaft_hz, fault, seed=1)
+        blocks = [sig.block(VIB_BLOCK) for _ in range(int(VIB_BENCH_TIME * fs) // VIB_BLOCK)]
+        start = time.perf_counter()
+        features = ingest(blocks, spec)
+        elapsed = time.perf_counter() - start
+        labels = collections.Counter(f.label for f in features)
+        print('{0:<7} {1} frames {2}, BPFO score {3:.1f}, BPFI score {4:.1f}, kurtosis {5:.1f}, '
+              '{6:.0f} samples/s ({7:.0f}x real time)'.format(
+                  fault, len(features), dict(labels), np.mean([f.bpfo for f in features]),
+                  np.mean([f.bpfi for f in features]), np.mean([f.kurtosis for f in features]),
+                  len(blocks) * VIB_BLOCK / elapsed, len(blocks) * VIB_BLOCK / elapsed / fs))
+
+
+if __name__ == "__main__":
+    main()